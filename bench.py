@@ -0,0 +1,273 @@
+#!/usr/bin/python3
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HLM_CONFIG = os.path.join(HERE, "hlm.yaml")
+
+# CLI invocation -> allowed seconds above a bare interpreter start. These run from cron
+# and shell loops, so --check fails when one goes over regardless of the baseline.
+STARTUP_BUDGETS = {
+    "templater.py --help": 0.1,
+    "templater.py wendler": 0.1,
+    "templater.py hlm": 0.1,
+}
+
+# name -> (setup(size) -> run(), per_object)
+BENCHMARKS = {}
+
+def benchmark(name: str, per_object: bool = True):
+    """
+    Register a benchmark. The decorated function takes a roster size and returns a
+    zero-argument callable that generates that many plans (or estimates).
+
+    Args:
+        name (str): The benchmark name, used as its baseline key.
+        per_object (bool): Whether the path handles one athlete at a time, so large
+            sizes are capped by --object-limit.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, per_object)
+        return setup
+    return register
+
+def _maxes(size: int):
+    import random
+    rng = random.Random(size)
+    return [[rng.uniform(60, 250) for _ in range(4)] for _ in range(size)]
+
+def _register_wendler():
+    from libwendler import WendlerBasic531Generator, Template
+
+    for template in Template:
+        def construct(size, template=template):
+            maxes = _maxes(size)
+            def run():
+                for squat, bench, deadlift, press in maxes:
+                    WendlerBasic531Generator(squat, bench, deadlift, press, templates=[template],
+                                             fsl_params={'sets': 5, 'reps': 5})
+            return run
+
+        def generate(size, template=template):
+            generators = [WendlerBasic531Generator(*m, templates=[template], fsl_params={'sets': 5, 'reps': 5})
+                          for m in _maxes(size)]
+            def run():
+                sink = io.StringIO()
+                for generator in generators:
+                    generator.generate(sink)
+            return run
+
+        benchmark(f"wendler.construct[{template.value}]")(construct)
+        benchmark(f"wendler.generate[{template.value}]")(generate)
+
+def _register_hlm():
+    from libconfig import clear_cache
+    from libhlm import HLMStandardGenerator, HLMAlternatePressingGenerator
+
+    for cls in (HLMStandardGenerator, HLMAlternatePressingGenerator):
+        def cold(size, cls=cls):
+            # Clear the config cache each time so every instance pays for YAML parsing
+            def run():
+                sink = io.StringIO()
+                for _ in range(size):
+                    clear_cache()
+                    cls(HLM_CONFIG).generate(sink)
+            return run
+
+        def warm(size, cls=cls):
+            def run():
+                sink = io.StringIO()
+                for _ in range(size):
+                    cls(HLM_CONFIG).generate(sink)
+            return run
+
+        benchmark(f"hlm.{cls.__name__}[cold-yaml]")(cold)
+        benchmark(f"hlm.{cls.__name__}[cached-yaml]")(warm)
+
+def _register_estimates():
+    from libwendler import OneRMFormula, estimate_1rm, estimate_1rm_batch
+
+    @benchmark("estimate_1rm")
+    def scalar(size):
+        sets = [(m[0], 1 + i % 10) for i, m in enumerate(_maxes(size))]
+        def run():
+            for weight, reps in sets:
+                estimate_1rm(weight, reps, OneRMFormula.BRZYCKI)
+        return run
+
+    @benchmark("estimate_1rm_batch", per_object=False)
+    def batch(size):
+        import numpy as np
+        rng = np.random.default_rng(size)
+        weights, reps = rng.uniform(60, 250, size), rng.integers(1, 11, size)
+        return lambda: estimate_1rm_batch(weights, reps, OneRMFormula.BRZYCKI)
+
+def _register_batch():
+    from libwendler import Template, generate_batch
+
+    @benchmark("generate_batch[fsl]", per_object=False)
+    def batch(size):
+        import numpy as np
+        maxes = np.random.default_rng(size).uniform(60, 250, (size, 4))
+        return lambda: generate_batch(maxes, templates=[Template.FSL], fsl_params={'sets': 5, 'reps': 5})
+
+def _register_hlm_batch():
+    from libhlm import calculate_batch
+
+    @benchmark("hlm.calculate_batch", per_object=False)
+    def batch(size):
+        import numpy as np
+        squat, pull, press = np.random.default_rng(size).uniform(60, 250, (3, size))
+        return lambda: calculate_batch(squat, pull, press)
+
+def _register_analytics():
+    from libanalytics import wendler_metrics
+    from libwendler import Template, generate_batch
+
+    @benchmark("wendler_metrics[fsl]", per_object=False)
+    def metrics(size):
+        import numpy as np
+        maxes = np.random.default_rng(size).uniform(60, 250, (size, 4))
+        batch = generate_batch(maxes, templates=[Template.FSL], fsl_params={'sets': 5, 'reps': 5})
+        return lambda: wendler_metrics(batch).summary()
+
+def register_all():
+    _register_wendler()
+    _register_hlm()
+    _register_estimates()
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return  # The batch paths need NumPy
+    _register_batch()
+    _register_hlm_batch()
+    _register_analytics()
+
+def measure_command(args: list, repeat: int = 5) -> float:
+    """
+    The fastest of several fresh-interpreter runs of a command, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def check_budgets(results: dict) -> list:
+    """
+    Descriptions of CLI startups that went over their STARTUP_BUDGETS entry.
+    """
+    overruns = []
+    bare = results.get("startup[interpreter]", {}).get("startup")
+    for command, budget in STARTUP_BUDGETS.items():
+        result = results.get(f"startup[{command}]")
+        if result is None or bare is None:
+            continue
+        overhead = result["startup"] - bare
+        if overhead > budget:
+            overruns.append(f"{command}: {overhead * 1000:.1f} ms over the interpreter, budget {budget * 1000:.0f} ms")
+    return overruns
+
+def run_benchmark(setup, size: int, repeat: int, memory: bool) -> dict:
+    """
+    Time a benchmark at one size, keeping the fastest of several runs.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        run = setup(size)
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    result = {"size": size, "seconds": seconds, "per_sec": size / seconds if seconds else float("inf")}
+    if memory:
+        run = setup(size)
+        tracemalloc.start()
+        run()
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Names of results that regressed past the threshold against the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if "per_sec" in result and result["per_sec"] < base["per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: {result['per_sec']:.0f}/s vs baseline {base['per_sec']:.0f}/s")
+        if "startup" in result and result["startup"] > base["startup"] * (1 + threshold):
+            regressions.append(f"{name}: {result['startup'] * 1000:.1f} ms vs baseline {base['startup'] * 1000:.1f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every plan generation path.")
+    parser.add_argument("--sizes", default="1,1000,100000,1000000",
+                        help="Comma-separated roster sizes (default: %(default)s).")
+    parser.add_argument("--object-limit", type=int, default=10000,
+                        help="Largest size for one-athlete-at-a-time paths (default: %(default)s).")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, fastest kept (default: %(default)s).")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory pass.")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "bench_baseline.json"),
+                        help="Baseline file (default: %(default)s).")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if any path regressed.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed fractional regression for --check (default: %(default)s).")
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    register_all()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    results = {}
+    startups = {f"startup[{module}]": ["-c", f"import {module}"] for module in ("libwendler", "libhlm")}
+    startups["startup[interpreter]"] = ["-c", "pass"]
+    startups.update({f"startup[{command}]": command.split() for command in STARTUP_BUDGETS})
+    selected = {name: command for name, command in startups.items() if args.filter in name}
+    if any("templater" in name for name in selected):
+        # Budgets are relative to a bare interpreter start
+        selected.setdefault("startup[interpreter]", startups["startup[interpreter]"])
+    for name, command in selected.items():
+        results[name] = {"startup": measure_command(command)}
+        print(f"{name:48} {results[name]['startup'] * 1000:10.1f} ms")
+
+    for name, (setup, per_object) in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        for size in sizes:
+            if per_object and size > args.object_limit:
+                continue
+            key = f"{name}@{size}"
+            results[key] = run_benchmark(setup, size, args.repeat, not args.no_memory)
+            peak = results[key].get("peak_bytes")
+            print(f"{key:48} {results[key]['per_sec']:12.0f}/s"
+                  + (f" {peak / 1e6:10.1f} MB peak" if peak is not None else ""))
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}; run with --save first.")
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold) + check_budgets(results)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
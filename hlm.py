@@ -1,29 +1,24 @@
 #!/usr/bin/python3
 
-from libhlm import HLMStandardGenerator, HLMAlternatePressingGenerator
+import argparse
+import os
+
+from libhlm import generators_from_file
+from libprofile import Instrumentation, NULL_INSTRUMENTATION
 
 if __name__ == '__main__':
-    hlm = HLMAlternatePressingGenerator(
-        # Squat:
-        squat=140,
+    parser = argparse.ArgumentParser(description="Generate HLM plans from a YAML config.")
+    parser.add_argument("config", nargs="?",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hlm.yaml"))
+    parser.add_argument("--profile", nargs="?", const="-", metavar="PATH",
+                        help="Write phase timings as JSON to PATH (default: stderr).")
+    parser.add_argument("--profile-memory", action="store_true", help="Include the tracemalloc peak in --profile.")
+    args = parser.parse_args()
 
-        # Press:
-        primary_press_name="OHP",
-        primary_press=75,
-        secondary_press_name="Weighted Dips",
-        secondary_press=50,
+    instrument = Instrumentation(memory=args.profile_memory) if args.profile else NULL_INSTRUMENTATION
 
-        # Pull:
-        pull=160,
+    for hlm in generators_from_file(args.config, instrument=instrument):
+        hlm.generate()
 
-        # Core Reductions:
-        medium_reduction=0.10, 
-        light_reduction=0.20,
-        
-        # Header Text:
-        header_text="""
-Accessories:
-  2-3x10 Chins
-"""
-    )
-    hlm.generate()
\ No newline at end of file
+    if instrument.enabled:
+        instrument.dump(args.profile)
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+
+import re
+from typing import List, Optional, Sequence
+
+from libhlm import HLMBatchResult, HLMStandardGenerator
+from libwendler import WendlerBatchResult
+
+# HLM session notes prescribing extra sets, e.g. "4x5 Backoff"
+BACKOFF_PATTERN = re.compile(r"(\d+)\s*x\s*(\d+)\s+backoff", re.IGNORECASE)
+
+# Brzycki's 1RM = weight x 36 / (37 - reps) makes a 5-rep max 32/36 of a 1RM
+FIVE_RM_FRACTION = (37 - 5) / 36
+
+class LoadMetrics:
+    """
+    Training-load metrics for a whole roster, per athlete, week and lift.
+
+    Every array has shape (athletes, weeks, lifts).
+
+    Attributes:
+        lifts (List[str]): Lift names, in column order.
+        weeks (List[str]): Week names, in order.
+        tonnage (numpy.ndarray): Sum of sets x reps x weight.
+        reps (numpy.ndarray): Total reps.
+        intensity (numpy.ndarray): Rep-weighted average relative intensity, as a fraction of 1RM.
+        inol (numpy.ndarray): Sum over sets of sets x reps / (100 - intensity in percent).
+    """
+
+    __slots__ = ("lifts", "weeks", "tonnage", "reps", "intensity", "inol")
+
+    METRICS = ("tonnage", "reps", "intensity", "inol")
+
+    def __init__(self, lifts: List[str], weeks: List[str], tonnage, reps, intensity, inol):
+        self.lifts = lifts
+        self.weeks = weeks
+        self.tonnage = tonnage
+        self.reps = reps
+        self.intensity = intensity
+        self.inol = inol
+
+    def __len__(self) -> int:
+        return self.tonnage.shape[0]
+
+    def athlete(self, index: int) -> dict:
+        """
+        One athlete's metrics as {week: {lift: {metric: value}}}.
+        """
+        return {
+            week: {
+                lift: {metric: float(getattr(self, metric)[index, w, l]) for metric in self.METRICS}
+                for l, lift in enumerate(self.lifts)
+            }
+            for w, week in enumerate(self.weeks)
+        }
+
+    def summary(self, percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> dict:
+        """
+        Roster-wide distributions: per metric, week and lift, the mean and percentiles over athletes.
+
+        Returns:
+            dict: {metric: {"mean": (weeks, lifts) array, "p50": (weeks, lifts) array, ...}}.
+        """
+        import numpy as np
+
+        summary = {}
+        for metric in self.METRICS:
+            values = getattr(self, metric)
+            stats = {"mean": np.nanmean(values, axis=0)}
+            for p, value in zip(percentiles, np.nanpercentile(values, percentiles, axis=0)):
+                stats[f"p{p:g}"] = value
+            summary[metric] = stats
+        return summary
+
+def _assumed_reps(reps: str, amrap_extra_reps: float, widowmaker_reps: float) -> float:
+    """
+    The reps a rep target is assumed to come to: "5+" is 5 plus amrap_extra_reps, an
+    open "AMRAP" is widowmaker_reps, and a range like "1-5" its top end.
+    """
+    reps = str(reps).strip()
+    if reps.upper() == "AMRAP":
+        return widowmaker_reps
+    if reps.endswith("+"):
+        return float(reps[:-1]) + amrap_extra_reps
+    if "-" in reps:
+        return float(reps.split("-")[1])
+    return float(reps)
+
+def _aggregate(weights, sets, reps, intensity) -> tuple:
+    """
+    Sum set-level load over the last axis. Sets whose weight is NaN are skipped.
+    """
+    import numpy as np
+
+    volume = np.where(np.isnan(weights), 0.0, sets * reps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tonnage = np.nansum(volume * weights, axis=-1)
+        total_reps = volume.sum(axis=-1)
+        intensity_reps = np.nansum(volume * intensity, axis=-1)
+        inol = np.nansum(volume / (100 - 100 * intensity), axis=-1)
+    return tonnage, total_reps, intensity_reps, inol
+
+def _metrics(lifts: List[str], weeks: List[str], parts: list) -> LoadMetrics:
+    import numpy as np
+
+    tonnage = sum(part[0] for part in parts)
+    reps = sum(part[1] for part in parts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intensity = np.where(reps > 0, sum(part[2] for part in parts) / reps, np.nan)
+    inol = sum(part[3] for part in parts)
+    return LoadMetrics(lifts, weeks, tonnage, reps, intensity, inol)
+
+def wendler_metrics(batch: WendlerBatchResult,
+                    amrap_extra_reps: float = 0.0,
+                    widowmaker_reps: float = 20.0,
+                    tm_fraction: float = 0.9) -> LoadMetrics:
+    """
+    Training-load metrics for every athlete of a generate_batch() result.
+
+    Working sets count once each; supplemental sets count sets x reps (e.g. FSL 5x5).
+
+    Args:
+        batch (WendlerBatchResult): Array-backed plans from generate_batch().
+        amrap_extra_reps (float): Reps assumed beyond the target on "+" sets.
+        widowmaker_reps (float): Reps assumed on a Widowmaker AMRAP set.
+        tm_fraction (float): Training max as a fraction of 1RM, to turn percentages
+            of training max into relative intensity.
+
+    Returns:
+        LoadMetrics: Metrics of shape (athletes, weeks, lifts).
+    """
+    import numpy as np
+
+    def table(rows: list, width: int, field) -> np.ndarray:
+        # (weeks, width), NaN-padded where a week has fewer sets
+        out = np.full((len(rows), width), np.nan)
+        for w, week_rows in enumerate(rows):
+            out[w, :len(week_rows)] = [field(row) for row in week_rows]
+        return out
+
+    working = [[("working", 1, reps, percent) for reps, percent in zip(week_reps, week_percentages)]
+               for week_reps, week_percentages in zip(batch.reps, batch.percentages.tolist())]
+
+    parts = []
+    for rows, weights in ((working, batch.working), (batch.supplemental_rows, batch.supplemental)):
+        if weights is None:
+            continue
+        width = weights.shape[-1]
+        sets = table(rows, width, lambda row: float(row[1]))
+        reps = table(rows, width, lambda row: _assumed_reps(row[2], amrap_extra_reps, widowmaker_reps))
+        intensity = table(rows, width, lambda row: float(row[3]) * tm_fraction)
+        # (weeks, sets) tables broadcast against (athletes, weeks, lifts, sets) weights
+        parts.append(_aggregate(weights, sets[:, None, :], reps[:, None, :], intensity[:, None, :]))
+
+    return _metrics(list(batch.lifts), list(batch.weeks), parts)
+
+def hlm_metrics(batch: HLMBatchResult,
+                sessions: Optional[dict] = None,
+                backoff_fraction: float = 0.9,
+                five_rm_fraction: float = FIVE_RM_FRACTION) -> LoadMetrics:
+    """
+    Training-load metrics for every athlete of an HLM calculate_batch() result.
+
+    Rep ranges count at their top end, and sets with a backoff note ("4x5 Backoff")
+    add those sets at backoff_fraction of the top set's weight. Relative intensity
+    is measured against each lift's heavy weight, taken to be a 5-rep max.
+
+    Args:
+        batch (HLMBatchResult): Calculated weights from calculate_batch().
+        sessions (Optional[dict]): The session table the weights are used in
+            (default: HLMStandardGenerator.SESSIONS).
+        backoff_fraction (float): Backoff set weight as a fraction of the top set.
+        five_rm_fraction (float): A 5-rep max as a fraction of 1RM (default: Brzycki).
+
+    Returns:
+        LoadMetrics: Metrics of shape (athletes, 1, lifts), for lifts squat, pull and press.
+    """
+    import numpy as np
+
+    sessions = sessions if sessions is not None else HLMStandardGenerator.SESSIONS
+    lifts = ["squat", "pull", "press"]
+
+    # Per lift, (weight fraction, sets, reps, weight key) for every set group prescribed
+    groups = {lift: [] for lift in lifts}
+    for entries in sessions.values():
+        for _, sets, reps, key, note in entries:
+            lift = key.split("_", 1)[1]
+            groups[lift].append((1.0, float(sets), _assumed_reps(reps, 0.0, 0.0), key))
+            match = BACKOFF_PATTERN.search(note or "")
+            if match:
+                groups[lift].append((backoff_fraction, float(match.group(1)), float(match.group(2)), key))
+
+    parts = []
+    for lift in lifts:
+        heavy = batch.column(f"heavy_{lift}")[:, None]
+        weights = np.stack([batch.column(key) * fraction for fraction, _, _, key in groups[lift]], axis=1)
+        sets = np.array([group[1] for group in groups[lift]])
+        reps = np.array([group[2] for group in groups[lift]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            intensity = weights / heavy * five_rm_fraction
+        parts.append(_aggregate(weights, sets, reps, intensity))
+
+    # Stack the per-lift (athletes,) sums into (athletes, 1 week, lifts)
+    stacked = [np.stack([part[i] for part in parts], axis=-1)[:, None, :] for i in range(4)]
+    return _metrics(lifts, ["Week 1"], [tuple(stacked)])
@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+
+import sys
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from libroster import RosterError, athlete_id, wendler_from_row
+from libwendler import DEFAULT_TM_INCREMENTS, MaxType, WendlerBasic531Generator
+
+LIFTS = ['squat', 'bench', 'deadlift', 'press']
+
+# Decision codes, as stored in Autoregulation.decisions; DECISIONS[code] is the name
+HOLD, INCREASE, RESET = 0, 1, 2
+DECISIONS = ("hold", "increase", "reset")
+
+def amrap_targets(structure: Optional[list] = None) -> List[Optional[int]]:
+    """
+    The minimum reps of each week's AMRAP set ("5+" is 5), None for weeks without one.
+
+    Args:
+        structure (Optional[list]): Week definitions (default: WendlerBasic531Generator.STRUCTURE_CORE).
+    """
+    structure = structure if structure is not None else WendlerBasic531Generator.STRUCTURE_CORE
+    targets = []
+    for week in structure:
+        amraps = [int(reps[:-1]) for reps in week["reps"] if reps.endswith("+")]
+        targets.append(amraps[-1] if amraps else None)
+    return targets
+
+def adjust_training_maxes(training_maxes, reps, targets: Sequence[Optional[int]], increments,
+                          min_extra_reps: float = 2,
+                          reset_percentage: float = 90.0):
+    """
+    Decide every athlete's next-cycle training max per lift in one vectorized pass.
+
+    A lift is reset when any logged AMRAP fell short of its target, increased when every
+    logged AMRAP beat its target by at least min_extra_reps, and held otherwise: when
+    targets were only just met, or nothing was logged.
+
+    Args:
+        training_maxes (array-like): (athletes, lifts) current training maxes, NaN for
+            lifts an athlete does not train.
+        reps (array-like): (athletes, lifts, weeks) reps achieved on each week's AMRAP set,
+            NaN where none was logged.
+        targets (Sequence[Optional[int]]): Minimum reps per week, None for weeks without an AMRAP set.
+        increments (array-like): Training max increase per lift, broadcast against (athletes, lifts).
+        min_extra_reps (float): Reps beyond every target needed to increase.
+        reset_percentage (float): Percentage of the current training max to reset to.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: (athletes, lifts) next training maxes, and
+            decision codes (HOLD, INCREASE or RESET).
+    """
+    import numpy as np
+
+    training_maxes = np.asarray(training_maxes, dtype=np.float64)
+    targets = np.array([np.nan if target is None else target for target in targets], dtype=np.float64)
+
+    # NaN where nothing was logged or the week has no AMRAP set
+    surplus = np.asarray(reps, dtype=np.float64) - targets
+    logged = ~np.isnan(surplus)
+    missed = (logged & (np.where(logged, surplus, 0.0) < 0)).any(axis=-1)
+    beaten = logged.any(axis=-1) & np.where(logged, surplus >= min_extra_reps, True).all(axis=-1)
+
+    decisions = np.where(missed, RESET, np.where(beaten, INCREASE, HOLD)).astype(np.int8)
+    # Lifts an athlete does not train are held, whatever was logged for them
+    decisions[np.isnan(training_maxes)] = HOLD
+    next_training_maxes = np.select(
+        [decisions == RESET, decisions == INCREASE],
+        [training_maxes * (reset_percentage / 100), training_maxes + np.asarray(increments, dtype=np.float64)],
+        training_maxes,
+    )
+    return next_training_maxes, decisions
+
+class Autoregulation:
+    """
+    A roster's AMRAP results and the training max adjustments they lead to, as
+    returned by autoregulate().
+
+    Attributes:
+        athletes (List[str]): Athlete ids, in roster order.
+        lifts (List[str]): Lift names, in column order.
+        rows (List[dict]): The roster rows the athletes' plans were generated from.
+        reps (numpy.ndarray): (athletes, lifts, weeks) logged AMRAP reps, NaN where missing.
+        training_maxes (numpy.ndarray): (athletes, lifts) this cycle's training maxes,
+            NaN for inactive lifts.
+        next_training_maxes (numpy.ndarray): (athletes, lifts) next cycle's training maxes.
+        decisions (numpy.ndarray): (athletes, lifts) HOLD, INCREASE or RESET codes.
+    """
+
+    __slots__ = ("athletes", "lifts", "rows", "reps", "training_maxes", "next_training_maxes", "decisions")
+
+    def __init__(self, athletes: List[str], lifts: List[str], rows: List[dict], reps,
+                 training_maxes, next_training_maxes, decisions):
+        self.athletes = athletes
+        self.lifts = lifts
+        self.rows = rows
+        self.reps = reps
+        self.training_maxes = training_maxes
+        self.next_training_maxes = next_training_maxes
+        self.decisions = decisions
+
+    def __len__(self) -> int:
+        return len(self.athletes)
+
+    def decision(self, index: int, lift: str) -> str:
+        """
+        The decision for one athlete's lift: "hold", "increase" or "reset".
+        """
+        return DECISIONS[self.decisions[index, self.lifts.index(lift)]]
+
+    def counts(self) -> dict:
+        """
+        How many athletes' lifts were held, increased and reset, per lift. Inactive lifts are not counted.
+        """
+        import numpy as np
+
+        active = ~np.isnan(self.training_maxes)
+        return {lift: {name: int(((self.decisions[:, l] == code) & active[:, l]).sum())
+                       for code, name in enumerate(DECISIONS)}
+                for l, lift in enumerate(self.lifts)}
+
+    def next_rows(self) -> Iterator[dict]:
+        """
+        Roster rows for next cycle: each athlete's row with the next training maxes and
+        max_type training_max, ready for wendler_from_row() or a roster file. Training maxes
+        are rounded to the 0.01 kg they are displayed at.
+        """
+        next_training_maxes = self.next_training_maxes.tolist()
+        for athlete, row, maxes in zip(self.athletes, self.rows, next_training_maxes):
+            row = dict(row)
+            row["athlete"] = athlete
+            for lift, tm in zip(self.lifts, maxes):
+                if tm == tm:  # Not NaN: the lift is active
+                    row[lift] = round(tm, 2)
+            row["max_type"] = MaxType.TRAINING_MAX.value
+            row.pop("tm_percentage", None)
+            yield row
+
+    def generators(self) -> Iterator[WendlerBasic531Generator]:
+        """
+        Next cycle's generators, one per athlete, in roster order.
+        """
+        for row in self.next_rows():
+            yield wendler_from_row(row)
+
+def autoregulate(roster: Iterable[Tuple[int, object]],
+                 results: Iterable[Tuple[int, object]],
+                 increments: Optional[dict] = None,
+                 min_extra_reps: float = 2,
+                 reset_percentage: float = 90.0,
+                 on_error: Optional[Callable[[RosterError], None]] = None) -> Autoregulation:
+    """
+    Turn a cycle's logged AMRAP results into next-cycle training maxes for a whole roster.
+
+    Each athlete's training maxes are this cycle's, as the roster row's generator
+    computes them, and the decision rules are those of adjust_training_maxes(), against
+    the rep targets of STRUCTURE_CORE ("5+", "3+", "1+").
+
+    Args:
+        roster (Iterable[Tuple[int, object]]): (line number, row) pairs of Wendler roster rows,
+            e.g. from read_roster(). A repeated athlete id is rejected.
+        results (Iterable[Tuple[int, object]]): (line number, row) pairs of logged AMRAP sets,
+            each with athlete (or id), lift, week (1, 2, ...) and reps. A later entry for the
+            same athlete, lift and week replaces an earlier one.
+        increments (Optional[dict]): Training max increase per lift (default: DEFAULT_TM_INCREMENTS).
+        min_extra_reps (float): Reps beyond every target needed to increase.
+        reset_percentage (float): Percentage of the current training max to reset to.
+        on_error (Optional[Callable]): Called with a RosterError for each rejected roster or
+            result row (default: print to stderr).
+
+    Returns:
+        Autoregulation: The adjustments, with next cycle's roster rows.
+    """
+    import numpy as np
+
+    on_error = on_error or (lambda error: print(error, file=sys.stderr))
+    increments = DEFAULT_TM_INCREMENTS if increments is None else increments
+    targets = amrap_targets()
+
+    athletes, rows, training_maxes = [], [], []
+    seen = set()
+    for line, row in roster:
+        if isinstance(row, Exception):
+            on_error(RosterError(line, None, str(row)))
+            continue
+        athlete = athlete_id(row, line)
+        try:
+            if athlete in seen:
+                raise ValueError(f"Duplicate athlete id {athlete!r}; only the first row is used.")
+            if row.get("generator"):
+                raise ValueError("AMRAP autoregulation applies to Wendler rows only.")
+            maxes = wendler_from_row(row).maxes
+        except (ValueError, TypeError, KeyError) as e:
+            on_error(RosterError(line, athlete, str(e)))
+            continue
+        seen.add(athlete)
+        athletes.append(athlete)
+        rows.append(row)
+        training_maxes.append([maxes.get(lift, np.nan) for lift in LIFTS])
+
+    # Gather the log's indexes first, then fill the reps array in one assignment
+    index = {athlete: i for i, athlete in enumerate(athletes)}
+    positions, values = ([], [], []), []
+    for line, row in results:
+        if isinstance(row, Exception):
+            on_error(RosterError(line, None, str(row)))
+            continue
+        # Results rows have no natural order, so a line number cannot stand in for the athlete
+        athlete = row.get("athlete", row.get("id"))
+        athlete = str(athlete) if athlete not in (None, "") else None
+        try:
+            if athlete is None:
+                raise ValueError("Results rows need an athlete field.")
+            if athlete not in index:
+                raise KeyError(f"athlete {athlete!r} is not in the roster")
+            lift = str(row["lift"]).lower()
+            if lift not in LIFTS:
+                raise ValueError(f"Unknown lift {row['lift']!r}. Expected one of {LIFTS}.")
+            week = int(row["week"])
+            if not (1 <= week <= len(targets)) or targets[week - 1] is None:
+                raise ValueError(f"Week {week} has no AMRAP set.")
+            reps = float(row["reps"])
+        except (ValueError, TypeError, KeyError) as e:
+            on_error(RosterError(line, athlete, str(e)))
+            continue
+        positions[0].append(index[athlete])
+        positions[1].append(LIFTS.index(lift))
+        positions[2].append(week - 1)
+        values.append(reps)
+
+    reps = np.full((len(athletes), len(LIFTS), len(targets)), np.nan)
+    reps[positions] = values
+    training_maxes = np.array(training_maxes, dtype=np.float64).reshape(len(athletes), len(LIFTS))
+
+    next_training_maxes, decisions = adjust_training_maxes(
+        training_maxes, reps, targets, [increments.get(lift, 0.0) for lift in LIFTS],
+        min_extra_reps, reset_percentage)
+    return Autoregulation(athletes, list(LIFTS), rows, reps, training_maxes, next_training_maxes, decisions)
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+
+from collections import OrderedDict
+from typing import Optional
+
+from libplan import Plan, Renderer
+
+class PlanCache:
+    """
+    A bounded LRU cache of built plans and their rendered bodies, shared across athletes.
+
+    Plans are keyed on each generator's cache_key(), which captures the exact inputs
+    its plan is built and rendered from, after training max calculation, so athletes who
+    end up with the same prescription share one plan and one rendering per renderer type. Cached plans are
+    shared and must not be modified.
+
+    Args:
+        max_size (int): Maximum number of distinct plans to keep.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to build a plan.
+        evictions (int): Plans dropped to stay within max_size.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # cache key -> [plan, {renderer type: rendered body}]
+        self._entries = OrderedDict()
+
+    def _entry(self, generator) -> list:
+        key = generator.cache_key()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = [generator.build_plan(), {}]
+        self._entries[key] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def plan(self, generator) -> Plan:
+        """
+        The plan a generator builds, built at most once per distinct cache key.
+        """
+        return self._entry(generator)[0]
+
+    def render(self, generator, renderer: Renderer, athlete: Optional[str] = None) -> str:
+        """
+        The rendered plan for a generator, framed for an athlete.
+
+        Args:
+            generator: A Wendler or HLM generator.
+            renderer (Renderer): How to render the plan.
+            athlete (Optional[str]): The athlete to frame the output for.
+
+        Returns:
+            str: The same text renderer.format() would produce.
+        """
+        plan, bodies = self._entry(generator)
+        body = bodies.get(type(renderer))
+        if body is None:
+            body = bodies[type(renderer)] = renderer.body(plan)
+        return renderer.frame(body, athlete)
+
+    def stats(self) -> dict:
+        """
+        Hit, miss and eviction counts plus the current size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "max_size": self.max_size}
+
+    def clear(self):
+        """
+        Drop every cached plan. Counters are kept.
+        """
+        self._entries.clear()
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+
+import os
+from collections import OrderedDict
+from typing import Tuple
+
+CACHE_SIZE = 256
+
+# Absolute path -> (mtime_ns, size, documents), least recently used first
+_cache = OrderedDict()
+
+def _load_all(f) -> list:
+    # PyYAML is imported on first use so callers that never read YAML don't pay for it.
+    import yaml
+
+    # Prefer the libyaml-backed loader, which parses several times faster.
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return [doc for doc in yaml.load_all(f, Loader=loader) if doc is not None]
+
+def load_documents(path: str) -> Tuple[dict, ...]:
+    """
+    Load every YAML document in a file, reusing the parsed result while the file is unchanged.
+
+    Parsed files are cached by path and invalidated when the file's mtime or size
+    changes; the least recently used entries are evicted beyond CACHE_SIZE files.
+    The returned mappings are shared between callers and must not be modified.
+
+    Args:
+        path (str): Path to the YAML file.
+
+    Returns:
+        Tuple[dict, ...]: One mapping per document, in file order. Empty documents are skipped.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _cache.move_to_end(key)
+        return cached[2]
+
+    with open(key, 'r') as f:
+        documents = tuple(_load_all(f))
+
+    _cache[key] = (stat.st_mtime_ns, stat.st_size, documents)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return documents
+
+def parse_documents(data) -> Tuple[dict, ...]:
+    """
+    Parse every YAML document in already-read text, without going through the cache.
+
+    Args:
+        data (str or bytes): The YAML text.
+
+    Returns:
+        Tuple[dict, ...]: One mapping per document, in order. Empty documents are skipped.
+
+    Raises:
+        ValueError: If the text is not valid YAML or a document is not a mapping.
+    """
+    import yaml
+
+    try:
+        documents = tuple(_load_all(data))
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {e}") from e
+    for document in documents:
+        if not isinstance(document, dict):
+            raise ValueError(f"Expected a mapping per document, got {type(document).__name__}.")
+    return documents
+
+def load_config(path: str) -> dict:
+    """
+    Load a single-document YAML configuration through the cache.
+
+    Args:
+        path (str): Path to the YAML file.
+
+    Returns:
+        dict: The first document in the file, or an empty mapping if there is none.
+    """
+    documents = load_documents(path)
+    return documents[0] if documents else {}
+
+def clear_cache():
+    """
+    Drop every cached configuration.
+    """
+    _cache.clear()
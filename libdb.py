@@ -0,0 +1,380 @@
+#!/usr/bin/python3
+
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager
+from enum import Enum
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from libcache import PlanCache
+from libplan import Plan, Week, Lift, Set
+from libplates import PlateEngine
+from libroster import RosterError, RosterStats, athlete_id, generator_from_row
+
+# Athletes are numbered once and referred to by number, so the millions of set rows
+# carry an integer rather than the athlete's id text. Inputs keep the Wendler options
+# as columns for querying, plus the whole roster row as JSON to regenerate from.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS athletes (
+    id INTEGER PRIMARY KEY,
+    athlete TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS inputs (
+    athlete_id INTEGER PRIMARY KEY REFERENCES athletes (id),
+    generator TEXT NOT NULL,
+    squat REAL, bench REAL, deadlift REAL, press REAL, pull REAL,
+    active_lifts TEXT,
+    templates TEXT,
+    fsl_sets INTEGER, fsl_reps INTEGER,
+    max_type TEXT,
+    tm_percentage REAL,
+    header_text TEXT,
+    row TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plans (
+    athlete_id INTEGER PRIMARY KEY REFERENCES athletes (id),
+    family TEXT NOT NULL,
+    title TEXT NOT NULL,
+    header_text TEXT,
+    maxes TEXT NOT NULL,
+    reductions TEXT
+);
+CREATE TABLE IF NOT EXISTS sets (
+    athlete_id INTEGER NOT NULL REFERENCES athletes (id),
+    week INTEGER NOT NULL,
+    week_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    lift TEXT NOT NULL,
+    day TEXT,
+    ordinal INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    sets INTEGER NOT NULL,
+    reps TEXT NOT NULL,
+    weight REAL NOT NULL,
+    percent REAL,
+    note TEXT,
+    plates TEXT,
+    PRIMARY KEY (athlete_id, week, position, ordinal)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sets_by_lift_week ON sets (lift, week);
+"""
+
+INPUT_COLUMNS = ("athlete_id", "generator", "squat", "bench", "deadlift", "press", "pull",
+                 "active_lifts", "templates", "fsl_sets", "fsl_reps", "max_type",
+                 "tm_percentage", "header_text", "row")
+
+# Statements are kept as constants so the connection's statement cache prepares each once
+INSERT_ATHLETE = "INSERT INTO athletes (athlete) VALUES (?) ON CONFLICT (athlete) DO NOTHING"
+UPSERT_INPUTS = (
+    f"INSERT INTO inputs ({', '.join(INPUT_COLUMNS)}) VALUES ({', '.join('?' * len(INPUT_COLUMNS))}) "
+    f"ON CONFLICT (athlete_id) DO UPDATE SET "
+    f"{', '.join(f'{column} = excluded.{column}' for column in INPUT_COLUMNS[1:])}"
+)
+UPSERT_PLAN = (
+    "INSERT INTO plans (athlete_id, family, title, header_text, maxes, reductions) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (athlete_id) DO UPDATE SET family = excluded.family, title = excluded.title, "
+    "header_text = excluded.header_text, maxes = excluded.maxes, reductions = excluded.reductions"
+)
+DELETE_SETS = "DELETE FROM sets WHERE athlete_id = ?"
+INSERT_SET = "INSERT INTO sets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Most variables a SELECT ... IN (...) is given at once
+_MAX_VARIABLES = 500
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+def _names(value) -> Optional[str]:
+    # Lists of lifts or templates are stored the way CSV rosters write them, "fsl|widowmaker"
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split("|")
+    return "|".join(v.value if isinstance(v, Enum) else str(v).strip() for v in value)
+
+def _number(row: dict, field: str) -> Optional[float]:
+    return float(row[field]) if row.get(field) is not None else None
+
+def _fsl(value) -> Tuple[Optional[int], Optional[int]]:
+    if value is None:
+        return None, None
+    if isinstance(value, str):
+        sets, reps = value.lower().split("x")
+        return int(sets), int(reps)
+    if not isinstance(value, dict):
+        raise ValueError(f"fsl_params must be <sets>x<reps> or a mapping of sets and reps, got {value!r}.")
+    return value.get('sets'), value.get('reps')
+
+def _inputs_record(row: dict) -> tuple:
+    # The inputs columns after the athlete id; raises ValueError or TypeError for mistyped fields
+    fsl_sets, fsl_reps = _fsl(row.get("fsl_params"))
+    max_type = row.get("max_type")
+    return (
+        row.get("generator") or "wendler",
+        _number(row, "squat"), _number(row, "bench"), _number(row, "deadlift"),
+        _number(row, "press"), _number(row, "pull"),
+        _names(row.get("active_lifts")), _names(row.get("templates")), fsl_sets, fsl_reps,
+        max_type.value if isinstance(max_type, Enum) else max_type,
+        _number(row, "tm_percentage"), row.get("header_text"),
+        json.dumps(row, default=_json_default),
+    )
+
+class PlanDatabase:
+    """
+    A SQLite database of athletes, the inputs their plans are generated from, and the
+    generated sets, one row per prescription line.
+
+    The connection is opened once in WAL mode and reused for every call, so readers can
+    query while a nightly run writes. Writes go through executemany() in transactions
+    of batch_size athletes, and reads are cursors, so neither holds a whole roster in
+    memory.
+
+    Args:
+        path (str): The database file; created with its schema if missing.
+        batch_size (int): Athletes written per transaction.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        # Transactions are managed explicitly, see _transaction()
+        self.connection = sqlite3.connect(path, isolation_level=None, cached_statements=64)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def _athlete_ids(self, athletes: List[str]) -> List[int]:
+        self.connection.executemany(INSERT_ATHLETE, ((athlete,) for athlete in athletes))
+        distinct = list(dict.fromkeys(athletes))
+        ids = {}
+        for start in range(0, len(distinct), _MAX_VARIABLES):
+            chunk = distinct[start:start + _MAX_VARIABLES]
+            ids.update(self.connection.execute(
+                f"SELECT athlete, id FROM athletes WHERE athlete IN ({', '.join('?' * len(chunk))})", chunk))
+        return [ids[athlete] for athlete in athletes]
+
+    def _write_inputs(self, batch: List[Tuple[str, tuple]]):
+        # Records come from _inputs_record(), built outside the transaction so a bad row cannot roll it back
+        ids = self._athlete_ids([athlete for athlete, _ in batch])
+        self.connection.executemany(UPSERT_INPUTS, ((number, *record) for number, (_, record) in zip(ids, batch)))
+
+    def _write_plans(self, batch: List[Tuple[str, Plan]]):
+        ids = self._athlete_ids([athlete for athlete, _ in batch])
+        self.connection.executemany(UPSERT_PLAN, (
+            (number, plan.family, plan.title, plan.header_text, json.dumps(plan.maxes),
+             json.dumps(plan.reductions) if plan.reductions is not None else None)
+            for number, (_, plan) in zip(ids, batch)
+        ))
+        # A plan's shape can change with its templates, so its sets are replaced wholesale
+        self.connection.executemany(DELETE_SETS, ((number,) for number in ids))
+        self.connection.executemany(INSERT_SET, (
+            (number, week.number, week.name, position, lift.name, lift.day, ordinal, s.kind, s.sets, s.reps,
+             s.weight, s.percent, s.note, ",".join(map(repr, s.plates)) if s.plates is not None else None)
+            for number, (_, plan) in zip(ids, batch)
+            for week in plan.weeks
+            for position, lift in enumerate(week.lifts)
+            for ordinal, s in enumerate(lift.sets)
+        ))
+
+    def _batches(self, items: Iterable[tuple]) -> Iterator[list]:
+        # Items are keyed by athlete id. A later item for an athlete replaces an earlier one
+        # in the same batch, as it would across batches; writing both would delete the
+        # athlete's sets once and then insert them twice.
+        batch = {}
+        for item in items:
+            batch.pop(item[0], None)
+            batch[item[0]] = item
+            if len(batch) >= self.batch_size:
+                yield list(batch.values())
+                batch = {}
+        if batch:
+            yield list(batch.values())
+
+    def upsert_inputs(self, rows: Iterable[Tuple[str, dict]]) -> int:
+        """
+        Insert or replace athletes' generator inputs. A later row for the same athlete
+        replaces an earlier one.
+
+        Args:
+            rows (Iterable[Tuple[str, dict]]): (athlete id, roster row) pairs, with the
+                fields read_roster() gives: lift maxes, templates, fsl_params, max_type,
+                tm_percentage and so on, or an HLM config with its `generator:` key.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            ValueError: If a row's fields have the wrong types. Earlier batches stay written.
+        """
+        written = 0
+        for batch in self._batches(rows):
+            records = []
+            for athlete, row in batch:
+                try:
+                    records.append((athlete, _inputs_record(row)))
+                except (ValueError, TypeError) as e:
+                    raise ValueError(f"athlete {athlete!r}: {e}") from e
+            with self._transaction():
+                self._write_inputs(records)
+            written += len(batch)
+        return written
+
+    def upsert_plans(self, plans: Iterable[Tuple[str, Plan]]) -> int:
+        """
+        Insert or replace athletes' generated plans, e.g. from build_roster().
+        A later plan for the same athlete replaces an earlier one.
+
+        Returns:
+            int: The number of plans written.
+        """
+        written = 0
+        for batch in self._batches(plans):
+            with self._transaction():
+                self._write_plans(batch)
+            written += len(batch)
+        return written
+
+    def store_roster(self, rows: Iterable[Tuple[int, object]],
+                     on_error: Optional[Callable[[RosterError], None]] = None,
+                     plates: Optional[PlateEngine] = None,
+                     cache: Optional[PlanCache] = None) -> RosterStats:
+        """
+        Generate a plan for every roster row and store both the row and the plan.
+
+        Each batch of athletes' inputs and plans is written in one transaction, so an
+        interrupted run leaves every athlete with matching inputs and sets. A later row
+        for the same athlete replaces an earlier one.
+
+        Args:
+            rows (Iterable[Tuple[int, object]]): (line number, row) pairs, e.g. from read_roster()
+                or roster().
+            on_error (Optional[Callable]): Called with a RosterError for each rejected row
+                (default: print to stderr).
+            plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+            cache (Optional[PlanCache]): Reuse plans across identical athletes.
+
+        Returns:
+            RosterStats: How many plans were stored and rows rejected.
+        """
+        on_error = on_error or (lambda error: print(error, file=sys.stderr))
+        stats = RosterStats()
+
+        def generate() -> Iterator[Tuple[str, tuple, Plan]]:
+            for line, row in rows:
+                if isinstance(row, Exception):
+                    stats.errors += 1
+                    on_error(RosterError(line, None, str(row)))
+                    continue
+                athlete = athlete_id(row, line)
+                try:
+                    generator = generator_from_row(row, plates)
+                    plan = cache.plan(generator) if cache is not None else generator.build_plan()
+                    record = _inputs_record(row)
+                except (ValueError, TypeError, KeyError) as e:
+                    stats.errors += 1
+                    on_error(RosterError(line, athlete, str(e)))
+                    continue
+                yield athlete, record, plan
+
+        for batch in self._batches(generate()):
+            with self._transaction():
+                self._write_inputs([(athlete, record) for athlete, record, _ in batch])
+                self._write_plans([(athlete, plan) for athlete, _, plan in batch])
+            stats.plans += len(batch)
+        return stats
+
+    def inputs(self, athlete: str) -> Optional[dict]:
+        """
+        The roster row an athlete's plan is generated from, or None if there is none.
+        """
+        result = self.connection.execute(
+            "SELECT row FROM inputs JOIN athletes ON athletes.id = inputs.athlete_id WHERE athlete = ?",
+            (str(athlete),)).fetchone()
+        return json.loads(result[0]) if result is not None else None
+
+    def roster(self) -> Iterator[Tuple[int, dict]]:
+        """
+        Every athlete's inputs as (number, row) pairs, in the order athletes were first
+        stored, ready for generate_roster(), build_roster() or store_roster().
+        """
+        cursor = self.connection.execute(
+            "SELECT id, athlete, row FROM inputs JOIN athletes ON athletes.id = inputs.athlete_id ORDER BY id")
+        for number, athlete, row in cursor:
+            row = json.loads(row)
+            row["athlete"] = athlete
+            yield number, row
+
+    def plan(self, athlete: str) -> Optional[Plan]:
+        """
+        An athlete's stored plan, or None if there is none.
+        """
+        athlete = str(athlete)
+        result = self.connection.execute(
+            "SELECT id, family, title, header_text, maxes, reductions "
+            "FROM plans JOIN athletes ON athletes.id = plans.athlete_id WHERE athlete = ?", (athlete,)).fetchone()
+        if result is None:
+            return None
+        number, family, title, header_text, maxes, reductions = result
+
+        weeks = []
+        week = lift = None
+        for (week_number, week_name, position, lift_name, day,
+             kind, sets, reps, weight, percent, note, plates) in self.connection.execute(
+                "SELECT week, week_name, position, lift, day, kind, sets, reps, weight, percent, note, plates "
+                "FROM sets WHERE athlete_id = ? ORDER BY week, position, ordinal", (number,)):
+            if week is None or week.number != week_number:
+                week = Week(week_number, week_name, [])
+                weeks.append(week)
+                lift = None
+            if lift is None or position != len(week.lifts) - 1:
+                lift = Lift(lift_name, [], day=day)
+                week.lifts.append(lift)
+            lift.sets.append(Set(kind, sets, reps, weight, percent, note,
+                                 tuple(float(p) for p in plates.split(",") if p) if plates is not None else None))
+
+        return Plan(family, title, json.loads(maxes), weeks, header_text=header_text,
+                    reductions=json.loads(reductions) if reductions is not None else None, athlete=athlete)
+
+    def sets(self, athlete: Optional[str] = None, lift: Optional[str] = None,
+             week: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Stored set rows, optionally only one athlete's, lift's or week's, read lazily.
+
+        Yields:
+            tuple: (athlete, week, lift, kind, sets, reps, weight, percent) per set row.
+        """
+        conditions, parameters = [], []
+        for column, value in (("athlete", athlete), ("lift", lift), ("week", week)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(str(value) if column == "athlete" else value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return iter(self.connection.execute(
+            "SELECT athlete, week, lift, kind, sets, reps, weight, percent "
+            f"FROM sets JOIN athletes ON athletes.id = sets.athlete_id{where}", parameters))
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM athletes").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "PlanDatabase":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
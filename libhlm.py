@@ -1,5 +1,166 @@
+import sys
 from typing import Optional
-import yaml
+
+from libconfig import load_documents, load_config
+from libplan import Plan, Week, Lift, Set, Renderer, TextRenderer, exact_items, hlm_line
+from libplates import PlateEngine
+from libprofile import NULL_INSTRUMENTATION
+
+def _calculate_weight(weights: dict, reductions: dict, source: tuple) -> float:
+    """
+    One calculated weight, before rounding, from its (weight, reduction, override) source.
+    """
+    weight, reduction, override = source
+    if override is not None and weights[override]:
+        return weights[override]
+    return weights[weight] * (1 - reductions[reduction]) if reduction is not None else weights[weight]
+
+def _round_weight(weight: float, plates: Optional[PlateEngine], rounding: float) -> float:
+    if plates is not None:
+        return plates.snap(weight)
+    return round(weight / rounding) * rounding
+
+def _calculate_weights(sources: dict, weights: dict, reductions: dict,
+                       plates: Optional[PlateEngine], rounding: float) -> dict:
+    """
+    Every calculated weight of a generator, rounded or snapped to plates.
+    """
+    return {key: _round_weight(_calculate_weight(weights, reductions, source), plates, rounding)
+            for key, source in sources.items()}
+
+class HLMBatchResult:
+    """
+    Array-backed HLM calculated weights for many athletes, as returned by calculate_batch().
+
+    Attributes:
+        keys (List[str]): Calculated weight keys, in column order.
+        weights (numpy.ndarray): (athletes, keys) rounded or plate-snapped weights.
+        plates (Optional[PlateEngine]): The plate engine weights were snapped with, for
+            looking up per-side plates with plates.plates_for().
+    """
+
+    __slots__ = ("keys", "weights", "plates")
+
+    def __init__(self, keys: list, weights, plates: Optional[PlateEngine] = None):
+        self.keys = keys
+        self.weights = weights
+        self.plates = plates
+
+    def __len__(self) -> int:
+        return self.weights.shape[0]
+
+    def column(self, key: str):
+        """
+        One calculated weight for every athlete.
+        """
+        return self.weights[:, self.keys.index(key)]
+
+    def calculated_weights(self, index: int) -> dict:
+        """
+        One athlete's weights in the form of a generator's calculated_weights.
+        """
+        return dict(zip(self.keys, self.weights[index].tolist()))
+
+def _calculate_weights_array(sources: dict, weights: dict, reductions: dict,
+                             plates: Optional[PlateEngine], rounding: float) -> HLMBatchResult:
+    """
+    The vectorized form of _calculate_weights(): weights and reductions map to arrays
+    (or scalars) over athletes. Optional weights that are NaN or 0 count as unset.
+    """
+    import numpy as np
+
+    columns = []
+    for weight, reduction, override in sources.values():
+        column = weights[weight] * (1 - reductions[reduction]) if reduction is not None else weights[weight]
+        if override is not None:
+            value = weights[override]
+            column = np.where(np.isnan(value) | (value == 0), column, value)
+        columns.append(column)
+    table = np.stack(np.broadcast_arrays(*[np.asarray(c, dtype=np.float64) for c in columns]), axis=1)
+
+    if plates is not None:
+        table = plates.snap_array(table)
+    else:
+        table = np.round(table / rounding) * rounding
+    return HLMBatchResult(list(sources), table, plates)
+
+def _session_lift(day: str, entry: tuple, calculated_weights: dict, plates: Optional[PlateEngine] = None) -> Lift:
+    name, sets, reps, key, note = entry
+    weight = calculated_weights[key]
+    return Lift(name, [Set("hlm", sets, reps, weight, note=note,
+                           plates=plates.plates_for(weight) if plates is not None else None)], day=day)
+
+def _session_lifts(sessions: dict, calculated_weights: dict, plates: Optional[PlateEngine] = None) -> list:
+    """
+    Expand (name, sets, reps, weight key, note) session entries into plan Lifts.
+    """
+    return [
+        _session_lift(day, entry, calculated_weights, plates)
+        for day, entries in sessions.items()
+        for entry in entries
+    ]
+
+def _session_segment(sessions: dict, key: str, calculated_weights: dict, plates: Optional[PlateEngine] = None) -> list:
+    """
+    The session entries prescribed at one calculated weight, with their position in the week.
+    """
+    entries = [(day, entry) for day, day_entries in sessions.items() for entry in day_entries]
+    return [(1, "Week 1", position, _session_lift(day, entry, calculated_weights, plates))
+            for position, (day, entry) in enumerate(entries) if entry[3] == key]
+
+def _segment_dependencies(sources: dict, inputs: dict) -> dict:
+    """
+    Calculated weight key -> the config keys that feed it.
+    """
+    dependencies = {}
+    for key, (weight, reduction, override) in sources.items():
+        targets = {("weights", weight), ("reductions", reduction), ("weights", override)}
+        dependencies[key] = frozenset(name for name, (attribute, target, _) in inputs.items()
+                                      if (attribute, target) in targets)
+    return dependencies
+
+def _set_inputs(generator, changes: dict) -> set:
+    """
+    Apply config changes to an HLM generator, recalculating only the weights they feed.
+
+    Changes to anything but a weight or reduction, or setting or clearing an optional
+    weight, can rename exercises or swap sessions, so the generator is reconfigured
+    and every input is reported as changed.
+    """
+    config = {**generator.config, **changes}
+    for name, value in changes.items():
+        spec = generator.INPUTS.get(name)
+        if spec is None or (spec[2] and bool(value) != bool(getattr(generator, spec[0])[spec[1]])):
+            generator._configure(config, generator.plates, generator.instrument)
+            return set(generator.INPUTS)
+
+    changed = set()
+    for name, value in changes.items():
+        attribute, target, optional = generator.INPUTS[name]
+        values = getattr(generator, attribute)
+        value = (value or None) if optional else value
+        if values[target] != value:
+            values[target] = value
+            changed.add(name)
+    generator.config = config
+
+    dependencies = _segment_dependencies(generator.WEIGHT_SOURCES, generator.INPUTS)
+    with generator.instrument.phase("rounding"):
+        for key, source in generator.WEIGHT_SOURCES.items():
+            if dependencies[key] & changed:
+                generator.calculated_weights[key] = _round_weight(
+                    _calculate_weight(generator.weights, generator.reductions, source),
+                    generator.plates, generator.ROUNDING_VALUE)
+    return changed
+
+def _fill_sessions(sessions: dict, names: dict) -> dict:
+    """
+    Fill the {exercise} placeholders of a session table with configured exercise names.
+    """
+    return {
+        day: [(name.format(**names), sets, reps, key, note) for name, sets, reps, key, note in entries]
+        for day, entries in sessions.items()
+    }
 
 class HLMStandardGenerator:
     """
@@ -9,7 +170,8 @@ class HLMStandardGenerator:
 
     Attributes:
         TEMPLATE_NAME (str): The name of the HLM template.
-        ROUNDING_VALUE (float): The value to which calculated weights are rounded.
+        ROUNDING_VALUE (float): The value to which calculated weights are rounded,
+            unless a PlateEngine is given.
 
     Args:
         squat (float): The input weight for squats (default: 100.0).
@@ -17,18 +179,87 @@ class HLMStandardGenerator:
         press (float): The input weight for presses (default: 100.0).
         medium_reduction (float): The reduction percentage for medium intensity (default: 0.10).
         light_reduction (float): The reduction percentage for light intensity (default: 0.20).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding (default: None).
+        instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
 
     Methods:
-        generate(): Prints the workout schedule including input weights and day-by-day exercises.
+        build_plan(): Computes the workout schedule as a structured Plan.
+        generate(): Renders the workout schedule including input weights and day-by-day exercises.
     """
 
     TEMPLATE_NAME = "HLM Standard 5s"
     ROUNDING_VALUE = 2.5
 
-    def __init__(self, config_file: str):
-        # Load configuration from YAML file
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+    # Config key -> (attribute, key) it is kept under, and whether it is optional
+    INPUTS = {
+        "squat": ("weights", "squat", False),
+        "pull": ("weights", "pull", False),
+        "press": ("weights", "press", False),
+        "medium_reduction": ("reductions", "medium", False),
+        "light_reduction": ("reductions", "light", False),
+    }
+
+    # Calculated weight key -> (weight, reduction applied to it, weight used instead when set)
+    WEIGHT_SOURCES = {
+        "heavy_squat": ("squat", None, None),
+        "medium_squat": ("squat", "medium", None),
+        "light_squat": ("squat", "light", None),
+        "heavy_pull": ("pull", None, None),
+        "medium_pull": ("pull", "medium", None),
+        "light_pull": ("pull", "light", None),
+        "heavy_press": ("press", None, None),
+        "medium_press": ("press", "medium", None),
+        "light_press": ("press", "light", None),
+    }
+
+    # Day -> (exercise, sets, reps, calculated weight key, note)
+    SESSIONS = {
+        "Mon": [
+            ("Heavy Squat", 1, "1-5", "heavy_squat", "4x5 Backoff"),
+            ("Medium Press", 4, "5", "medium_press", None),
+            ("Light Pull", 3, "3-5", "light_pull", None),
+        ],
+        "Wed": [
+            ("Light Squat", 3, "5", "light_squat", None),
+            ("Light Press", 3, "5", "light_press", None),
+            ("Heavy Pull", 2, "1-5", "heavy_pull", None),
+        ],
+        "Fri": [
+            ("Medium Squat", 4, "5", "medium_squat", None),
+            ("Heavy Press", 1, "1-5", "heavy_press", "4x5 Backoff"),
+            ("Medium Pull", 3, "4-5", "medium_pull", None),
+        ]
+    }
+
+    def __init__(self, config_file: str, plates: Optional[PlateEngine] = None, instrument=None):
+        instrument = instrument if instrument is not None else NULL_INSTRUMENTATION
+        # Load configuration from YAML file (parsed once per file version)
+        with instrument.phase("config_load"):
+            config = load_config(config_file)
+        self._configure(config, plates, instrument)
+
+    @classmethod
+    def from_config(cls, config: dict, plates: Optional[PlateEngine] = None, instrument=None) -> "HLMStandardGenerator":
+        """
+        Create a generator from an already-parsed configuration mapping.
+
+        Args:
+            config (dict): The configuration, with the same keys as the YAML file.
+            plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+            instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
+
+        Returns:
+            HLMStandardGenerator: The configured generator.
+        """
+        generator = cls.__new__(cls)
+        generator._configure(config, plates, instrument if instrument is not None else NULL_INSTRUMENTATION)
+        return generator
+
+    def _configure(self, config: dict, plates: Optional[PlateEngine] = None, instrument=NULL_INSTRUMENTATION,
+                   calculate: bool = True):
+        self.config = config
+        self.plates = plates
+        self.instrument = instrument
 
         # Extract values from config
         squat = config.get('squat', 100.0)
@@ -48,61 +279,103 @@ class HLMStandardGenerator:
             "light": light_reduction,
         }
 
-        self.calculated_weights = {
-            "heavy_squat": squat,
-            "medium_squat": self.weights["squat"] * (1 - self.reductions["medium"]),
-            "light_squat": self.weights["squat"] * (1 - self.reductions["light"]),
-            "heavy_pull": pull,
-            "medium_pull": self.weights["pull"] * (1 - self.reductions["medium"]),
-            "light_pull": self.weights["pull"] * (1 - self.reductions["light"]),
-            "heavy_press": press,
-            "medium_press": self.weights["press"] * (1 - self.reductions["medium"]),
-            "light_press": self.weights["press"] * (1 - self.reductions["light"]),
-        }
-
-        for key in self.calculated_weights:
-            self.calculated_weights[key] = round(self.calculated_weights[key] / self.ROUNDING_VALUE) * self.ROUNDING_VALUE
-
-        self.schedule = {
-            "Mon": [
-                f"Heavy Squat 1x1-5 - {self.calculated_weights['heavy_squat']} kg, 4x5 Backoff",
-                f"Medium Press 4x5 - {self.calculated_weights['medium_press']} kg",
-                f"Light Pull 3x3-5 - {self.calculated_weights['light_pull']} kg"
-            ],
-            "Wed": [
-                f"Light Squat 3x5 - {self.calculated_weights['light_squat']} kg",
-                f"Light Press 3x5 - {self.calculated_weights['light_press']} kg",
-                f"Heavy Pull 2x1-5 - {self.calculated_weights['heavy_pull']} kg"
-            ],
-            "Fri": [
-                f"Medium Squat 4x5 - {self.calculated_weights['medium_squat']} kg",
-                f"Heavy Press 1x1-5 - {self.calculated_weights['heavy_press']} kg, 4x5 Backoff",
-                f"Medium Pull 3x4-5 - {self.calculated_weights['medium_pull']} kg"
-            ]
-        }
-
-    def generate(self):
-
-        # Generate the output
-        output = ""
-        output += f"HLM: {self.TEMPLATE_NAME}\n\n"
-
-        # Print the Input Weights:
-        output += "Weights:\n"
-        for exercise, weight in self.weights.items():
-            output += f"  {exercise.title()} (5s) - {weight} kg\n"
-        output += "\n"
-
-        for day, exercises in self.schedule.items():
-            output += f"{day}:\n"
-            for exercise in exercises:
-                output += f"  {exercise}\n"
-            output += "\n"
-        output = output.rstrip("\n")
-        output += "\n"
-
-        # Print the workout schedule
-        print(output)
+        # Left to generators_from_batch() when calculating many configs at once
+        self.calculated_weights = None
+        if calculate:
+            with self.instrument.phase("rounding"):
+                self.calculated_weights = _calculate_weights(self.WEIGHT_SOURCES, self.weights, self.reductions,
+                                                             self.plates, self.ROUNDING_VALUE)
+
+        self.sessions = self.SESSIONS
+
+    def cache_key(self) -> tuple:
+        """
+        A hashable key identifying the plan this generator builds.
+
+        Keys capture the exact weights, as printed, that the plan is built and rendered
+        from, so generators with equal keys build identical plans.
+        """
+        return (
+            type(self).__name__,
+            exact_items(self.weights),
+            exact_items(self.calculated_weights),
+            self.plates.cache_key() if self.plates is not None else None,
+        )
+
+    @property
+    def schedule(self) -> dict:
+        """
+        The day-by-day schedule as display lines.
+        """
+        schedule = {}
+        for lift in _session_lifts(self.sessions, self.calculated_weights, self.plates):
+            schedule.setdefault(lift.day, []).append(hlm_line(lift))
+        return schedule
+
+    def build_plan(self) -> Plan:
+        """
+        Compute the HLM week without rendering it.
+
+        Returns:
+            Plan: The structured plan.
+        """
+        with self.instrument.phase("build"):
+            return self.plan_from_weeks([Week(1, "Week 1", _session_lifts(self.sessions, self.calculated_weights, self.plates))])
+
+    def plan_from_weeks(self, weeks: list) -> Plan:
+        """
+        Wrap already-built weeks in this generator's plan title, weights and header.
+        """
+        return Plan(
+            family="hlm",
+            title=f"HLM: {self.TEMPLATE_NAME}",
+            maxes=dict(self.weights),
+            weeks=weeks,
+        )
+
+    def segment_dependencies(self) -> dict:
+        """
+        The plan's segments and the config keys each depends on: one segment per
+        calculated weight, holding the session entries prescribed at it.
+        """
+        return _segment_dependencies(self.WEIGHT_SOURCES, self.INPUTS)
+
+    def build_segment(self, key: str) -> list:
+        """
+        Build one calculated weight's segment.
+
+        Returns:
+            list: (week number, week name, position in week, Lift) per session entry using the weight.
+        """
+        return _session_segment(self.sessions, key, self.calculated_weights, self.plates)
+
+    def set_inputs(self, **config) -> set:
+        """
+        Change some configuration values, recalculating only the weights they feed.
+
+        Returns:
+            set: The config keys whose segments must be rebuilt.
+        """
+        return _set_inputs(self, config)
+
+    def generate(self, out=None, renderer: Optional[Renderer] = None) -> Plan:
+        """
+        Generate the HLM week and render it.
+
+        Args:
+            out: File-like object to write to (default: sys.stdout).
+            renderer (Optional[Renderer]): How to render the plan (default: TextRenderer).
+
+        Returns:
+            Plan: The structured plan that was rendered.
+        """
+        plan = self.build_plan()
+        renderer = renderer or TextRenderer()
+        with self.instrument.phase("render"):
+            output = renderer.preamble() + renderer.format(plan)
+        with self.instrument.phase("write"):
+            (out if out is not None else sys.stdout).write(output)
+        return plan
 
 class HLMAlternatePressingGenerator:
     """
@@ -112,7 +385,8 @@ class HLMAlternatePressingGenerator:
 
     Attributes:
         TEMPLATE_NAME (str): The name of the HLM template.
-        ROUNDING_VALUE (float): The value to which calculated weights are rounded.
+        ROUNDING_VALUE (float): The value to which calculated weights are rounded,
+            unless a PlateEngine is given.
 
     Args:
 
@@ -141,18 +415,103 @@ class HLMAlternatePressingGenerator:
         # Header Text:
         header_text (str): Additional text to include in the workout schedule (default: None).
 
+        # Plate Loading:
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding (default: None).
+        instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
+
 
     Methods:
-        generate(): Prints the workout schedule including input weights and day-by-day exercises.
+        build_plan(): Computes the workout schedule as a structured Plan.
+        generate(): Renders the workout schedule including input weights and day-by-day exercises.
     """
 
     TEMPLATE_NAME = "HLM 5s (Alternate Pressing)"
     ROUNDING_VALUE = 2.5
 
-    def __init__(self, config_file: str):
-        # Load configuration from YAML file
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+    # Config key -> (attribute, key) it is kept under, and whether it is optional.
+    # Setting or clearing an optional weight changes exercise names and sessions.
+    INPUTS = {
+        "squat": ("weights", "heavy_squat", False),
+        "primary_press": ("weights", "primary_press", False),
+        "secondary_press": ("weights", "secondary_press", True),
+        "pull": ("weights", "heavy_pull", False),
+        "medium_pull": ("weights", "medium_pull", True),
+        "light_pull": ("weights", "light_pull", True),
+        "medium_reduction": ("reductions", "medium", False),
+        "light_reduction": ("reductions", "light", False),
+    }
+
+    # Calculated weight key -> (weight, reduction applied to it, weight used instead when set)
+    WEIGHT_SOURCES = {
+        "heavy_squat": ("heavy_squat", None, None),
+        "medium_squat": ("heavy_squat", "medium", None),
+        "light_squat": ("heavy_squat", "light", None),
+        "heavy_press": ("primary_press", None, None),
+        "medium_press": ("primary_press", "medium", None),
+        "light_press": ("primary_press", "light", "secondary_press"),
+        "heavy_pull": ("heavy_pull", None, None),
+        "medium_pull": ("heavy_pull", "medium", "medium_pull"),
+        "light_pull": ("heavy_pull", "light", "light_pull"),
+    }
+
+    # Day -> (exercise, sets, reps, calculated weight key, note); {names} are exercise names
+    SESSIONS = {
+        "Mon": [
+            ("Heavy Squat", 1, "1-5", "heavy_squat", "4x5 Backoff"),
+            ("Medium {primary_press}", 4, "5", "medium_press", None),
+            ("Light {light_pull}", 3, "3-5", "light_pull", None),
+        ],
+        "Wed": [
+            ("Light Squat", 3, "5", "light_squat", None),
+            ("Light {primary_press}", 3, "5", "light_press", None),
+            ("Heavy {heavy_pull}", 2, "1-5", "heavy_pull", None),
+        ],
+        "Fri": [
+            ("Medium Squat", 4, "5", "medium_squat", None),
+            ("Heavy {primary_press}", 1, "1-5", "heavy_press", "4x5 Backoff"),
+            ("Medium {medium_pull}", 3, "4-5", "medium_pull", None),
+        ]
+    }
+
+    # With a secondary press, Wednesday's light press becomes a heavy secondary press
+    SECONDARY_PRESS_SESSIONS = {
+        **SESSIONS,
+        "Wed": [
+            ("Light Squat", 3, "5", "light_squat", None),
+            ("Heavy {secondary_press}", 1, "5", "light_press", "4x5 Backoff"),
+            ("Heavy {heavy_pull}", 2, "1-5", "heavy_pull", None),
+        ],
+    }
+
+    def __init__(self, config_file: str, plates: Optional[PlateEngine] = None, instrument=None):
+        instrument = instrument if instrument is not None else NULL_INSTRUMENTATION
+        # Load configuration from YAML file (parsed once per file version)
+        with instrument.phase("config_load"):
+            config = load_config(config_file)
+        self._configure(config, plates, instrument)
+
+    @classmethod
+    def from_config(cls, config: dict, plates: Optional[PlateEngine] = None, instrument=None) -> "HLMAlternatePressingGenerator":
+        """
+        Create a generator from an already-parsed configuration mapping.
+
+        Args:
+            config (dict): The configuration, with the same keys as the YAML file.
+            plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+            instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
+
+        Returns:
+            HLMAlternatePressingGenerator: The configured generator.
+        """
+        generator = cls.__new__(cls)
+        generator._configure(config, plates, instrument if instrument is not None else NULL_INSTRUMENTATION)
+        return generator
+
+    def _configure(self, config: dict, plates: Optional[PlateEngine] = None, instrument=NULL_INSTRUMENTATION,
+                   calculate: bool = True):
+        self.config = config
+        self.plates = plates
+        self.instrument = instrument
 
         # Extract values from config with defaults
         heavy_squat_name = config.get('heavy_squat_name', 'Squat')
@@ -187,7 +546,6 @@ class HLMAlternatePressingGenerator:
             "medium_pull": medium_pull_name or None,
             "light_pull": light_pull_name or None
         }
-
         self.weights = {
             "heavy_squat": squat,
 
@@ -199,78 +557,254 @@ class HLMAlternatePressingGenerator:
             "light_pull": light_pull or None
         }
 
+        # Every weighted exercise is rendered under its name; only unweighted ones may be unnamed
+        for exercise, name in self.exercise_names.items():
+            if not isinstance(name, str) and (name is not None or self.weights[exercise] is not None):
+                raise ValueError(f"{exercise}_name must be text, got {name!r}.")
+
         self.reductions = {
             "medium": medium_reduction,
             "light": light_reduction,
         }
 
-        self.calculated_weights = {
+        # Left to generators_from_batch() when calculating many configs at once
+        self.calculated_weights = None
+        if calculate:
+            with self.instrument.phase("rounding"):
+                self.calculated_weights = _calculate_weights(self.WEIGHT_SOURCES, self.weights, self.reductions,
+                                                             self.plates, self.ROUNDING_VALUE)
+
+        # Pulls without their own weight are trained as the heavy pull
+        names = {
+            "primary_press": self.exercise_names['primary_press'],
+            "secondary_press": self.exercise_names['secondary_press'],
+            "heavy_pull": self.exercise_names['heavy_pull'],
+            "medium_pull": self.exercise_names['medium_pull'] if self.weights['medium_pull'] else self.exercise_names['heavy_pull'],
+            "light_pull": self.exercise_names['light_pull'] if self.weights['light_pull'] else self.exercise_names['heavy_pull'],
+        }
+        sessions = self.SECONDARY_PRESS_SESSIONS if self.weights['secondary_press'] else self.SESSIONS
+        self.sessions = _fill_sessions(sessions, names)
+
+    def cache_key(self) -> tuple:
+        """
+        A hashable key identifying the plan this generator builds.
+
+        Keys capture the exact weights, as printed, that the plan is built and rendered
+        from, so generators with equal keys build identical plans.
+        """
+        return (
+            type(self).__name__,
+            exact_items(self.weights),
+            exact_items(self.exercise_names),
+            exact_items(self.reductions),
+            exact_items(self.calculated_weights),
+            self.header_text,
+            self.plates.cache_key() if self.plates is not None else None,
+        )
+
+    @property
+    def schedule(self) -> dict:
+        """
+        The day-by-day schedule as display lines.
+        """
+        schedule = {}
+        for lift in _session_lifts(self.sessions, self.calculated_weights, self.plates):
+            schedule.setdefault(lift.day, []).append(hlm_line(lift))
+        return schedule
+
+    def build_plan(self) -> Plan:
+        """
+        Compute the HLM week without rendering it.
+
+        Returns:
+            Plan: The structured plan.
+        """
+        with self.instrument.phase("build"):
+            return self.plan_from_weeks([Week(1, "Week 1", _session_lifts(self.sessions, self.calculated_weights, self.plates))])
+
+    def plan_from_weeks(self, weeks: list) -> Plan:
+        """
+        Wrap already-built weeks in this generator's plan title, weights and header.
+        """
+        return Plan(
+            family="hlm",
+            title=f"HLM: {self.TEMPLATE_NAME}",
+            maxes={self.exercise_names[exercise]: weight for exercise, weight in self.weights.items() if weight is not None},
+            weeks=weeks,
+            header_text=self.header_text,
+            reductions=dict(self.reductions),
+        )
+
+    def segment_dependencies(self) -> dict:
+        """
+        The plan's segments and the config keys each depends on: one segment per
+        calculated weight, holding the session entries prescribed at it.
+        """
+        return _segment_dependencies(self.WEIGHT_SOURCES, self.INPUTS)
+
+    def build_segment(self, key: str) -> list:
+        """
+        Build one calculated weight's segment.
+
+        Returns:
+            list: (week number, week name, position in week, Lift) per session entry using the weight.
+        """
+        return _session_segment(self.sessions, key, self.calculated_weights, self.plates)
+
+    def set_inputs(self, **config) -> set:
+        """
+        Change some configuration values, recalculating only the weights they feed.
+
+        Returns:
+            set: The config keys whose segments must be rebuilt.
+        """
+        return _set_inputs(self, config)
+
+    def generate(self, out=None, renderer: Optional[Renderer] = None) -> Plan:
+        """
+        Generate the HLM week and render it.
+
+        Args:
+            out: File-like object to write to (default: sys.stdout).
+            renderer (Optional[Renderer]): How to render the plan (default: TextRenderer).
+
+        Returns:
+            Plan: The structured plan that was rendered.
+        """
+        plan = self.build_plan()
+        renderer = renderer or TextRenderer()
+        with self.instrument.phase("render"):
+            output = renderer.preamble() + renderer.format(plan)
+        with self.instrument.phase("write"):
+            (out if out is not None else sys.stdout).write(output)
+        return plan
+
+GENERATORS = {
+    "HLMStandardGenerator": HLMStandardGenerator,
+    "HLMAlternatePressingGenerator": HLMAlternatePressingGenerator,
+}
+
+def generator_from_config(config: dict, plates: Optional[PlateEngine] = None, instrument=None):
+    """
+    Create the HLM generator named by a configuration's `generator:` key.
+
+    Args:
+        config (dict): The configuration mapping.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
 
-            "heavy_squat": self.weights['heavy_squat'],
-            "medium_squat": self.weights["heavy_squat"] * (1 - self.reductions["medium"]),
-            "light_squat": self.weights["heavy_squat"] * (1 - self.reductions["light"]),
-            
-            "heavy_press": self.weights['primary_press'],
-            "medium_press": self.weights["primary_press"] * (1 - self.reductions["medium"]),
-            "light_press": self.weights['secondary_press'] if self.weights['secondary_press'] else self.weights['primary_press'] * (1 - self.reductions["light"]),
+    Returns:
+        The configured HLMStandardGenerator or HLMAlternatePressingGenerator.
 
-            "heavy_pull": self.weights['heavy_pull'],
-            "medium_pull": self.weights['medium_pull'] if self.weights['medium_pull'] else self.weights["heavy_pull"] * (1 - self.reductions["medium"]),
-            "light_pull": self.weights['light_pull'] if self.weights['light_pull'] else self.weights["heavy_pull"] * (1 - self.reductions["light"]),
-        }
+    Raises:
+        ValueError: If the generator key is missing or unknown.
+    """
+    name = config.get('generator')
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown HLM generator: {name!r}. Expected one of {list(GENERATORS)}.")
+    return GENERATORS[name].from_config(config, plates, instrument)
 
-        for key in self.calculated_weights:
-            self.calculated_weights[key] = round(self.calculated_weights[key] / self.ROUNDING_VALUE) * self.ROUNDING_VALUE
-
-        self.schedule = {
-            "Mon": [
-                f"Heavy Squat 1x1-5 - {self.calculated_weights['heavy_squat']} kg, 4x5 Backoff",
-                f"Medium {self.exercise_names['primary_press']} 4x5 - {self.calculated_weights['medium_press']} kg",
-                f"Light {self.exercise_names['light_pull']} 3x3-5 - {self.calculated_weights['light_pull']} kg" if self.weights['light_pull'] else
-                    f"Light {self.exercise_names['heavy_pull']} 3x3-5 - {self.calculated_weights['light_pull']} kg"
-            ],
-            "Wed": [
-                f"Light Squat 3x5 - {self.calculated_weights['light_squat']} kg",
-                f"Heavy {self.exercise_names['secondary_press']} 1x5 - {self.calculated_weights['light_press']} kg, 4x5 Backoff" if self.weights['secondary_press'] else 
-                    f"Light {self.exercise_names['primary_press']} 3x5 - {self.calculated_weights['light_press']} kg",
-                f"Heavy {self.exercise_names['heavy_pull']} 2x1-5 - {self.calculated_weights['heavy_pull']} kg"
-            ],
-            "Fri": [
-                f"Medium Squat 4x5 - {self.calculated_weights['medium_squat']} kg",
-                f"Heavy {self.exercise_names['primary_press']} 1x1-5 - {self.calculated_weights['heavy_press']} kg, 4x5 Backoff",
-                f"Medium {self.exercise_names['medium_pull']} 3x4-5 - {self.calculated_weights['medium_pull']} kg" if self.weights['medium_pull'] else
-                    f"Medium {self.exercise_names['heavy_pull']} 3x4-5 - {self.calculated_weights['medium_pull']} kg"
-            ]
-        }
+def generators_from_file(path: str, plates: Optional[PlateEngine] = None, instrument=None) -> list:
+    """
+    Create one HLM generator per document in a (possibly multi-document) YAML file.
+
+    Each document is dispatched on its `generator:` key, so a roster of athletes can
+    live in one file separated by `---` and be parsed once.
 
-    def generate(self):
-
-        # Generate the output
-        output = ""
-        output += f"HLM: {self.TEMPLATE_NAME}\n\n"
-
-        # Print the Input Weights:
-        output += "Weights:\n"
-        for exercise, weight in self.weights.items():
-            if weight == None:
-                continue
-            exercise_name = self.exercise_names[exercise]
-            output += f"  {exercise_name.title()} (5s) - {weight} kg\n"
-
-        output += "\nReductions:\n"
-        for reduction, value in self.reductions.items():
-            output += f"  {reduction.title()} Reduction - {value * 100}%\n"
-
-        output += "\n" + (self.header_text if self.header_text else "")
-        output += "\n"
-
-        for day, exercises in self.schedule.items():
-            output += f"{day}:\n"
-            for exercise in exercises:
-                output += f"  {exercise}\n"
-            output += "\n"
-        output = output.rstrip("\n")
-        output += "\n"
-
-        # Print the workout schedule
-        print(output)
+    Args:
+        path (str): Path to the YAML file.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
+
+    Returns:
+        list: The configured generators, in document order.
+    """
+    instrument = instrument if instrument is not None else NULL_INSTRUMENTATION
+    with instrument.phase("config_load"):
+        documents = load_documents(path)
+    return [generator_from_config(config, plates, instrument) for config in documents]
+
+def calculate_batch(squat, pull, press,
+                    secondary_press=None,
+                    medium_pull=None,
+                    light_pull=None,
+                    medium_reduction=0.10,
+                    light_reduction=0.20,
+                    plates: Optional[PlateEngine] = None) -> HLMBatchResult:
+    """
+    Compute every heavy, medium and light HLM weight for many athletes in one vectorized pass.
+
+    Weights are calculated and rounded (or snapped to plates) exactly like the
+    generators do. Without secondary press or pull overrides the results are those
+    of HLMStandardGenerator; with them, those of HLMAlternatePressingGenerator.
+
+    Args:
+        squat, pull, press (array-like): Per-athlete input weights (press is the primary press).
+        secondary_press (Optional[array-like]): Secondary press weights, replacing the light press; NaN or 0 where unset.
+        medium_pull (Optional[array-like]): Medium pull weights, replacing the reduced pull; NaN or 0 where unset.
+        light_pull (Optional[array-like]): Light pull weights, replacing the reduced pull; NaN or 0 where unset.
+        medium_reduction (array-like): Per-athlete (or shared) medium reduction.
+        light_reduction (array-like): Per-athlete (or shared) light reduction.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+
+    Returns:
+        HLMBatchResult: One row of calculated weights per athlete.
+    """
+    import numpy as np
+
+    def array(values):
+        return np.asarray(values if values is not None else np.nan, dtype=np.float64)
+
+    weights = {
+        "heavy_squat": array(squat),
+        "primary_press": array(press),
+        "secondary_press": array(secondary_press),
+        "heavy_pull": array(pull),
+        "medium_pull": array(medium_pull),
+        "light_pull": array(light_pull),
+    }
+    reductions = {"medium": array(medium_reduction), "light": array(light_reduction)}
+    return _calculate_weights_array(HLMAlternatePressingGenerator.WEIGHT_SOURCES, weights, reductions,
+                                    plates, HLMAlternatePressingGenerator.ROUNDING_VALUE)
+
+def generators_from_batch(configs: list, plates: Optional[PlateEngine] = None) -> list:
+    """
+    Create one HLM generator per configuration, calculating their weights together.
+
+    Each configuration is parsed as usual, but the calculated weights of all the
+    generators of a class are computed in one vectorized pass and handed to them.
+
+    Args:
+        configs (list): Configuration mappings, each dispatched on its `generator:` key.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+
+    Returns:
+        list: The configured generators, in configuration order.
+
+    Raises:
+        ValueError: If a generator key is missing or unknown.
+    """
+    import numpy as np
+
+    generators = []
+    for config in configs:
+        name = config.get('generator')
+        if name not in GENERATORS:
+            raise ValueError(f"Unknown HLM generator: {name!r}. Expected one of {list(GENERATORS)}.")
+        generator = GENERATORS[name].__new__(GENERATORS[name])
+        generator._configure(config, plates, NULL_INSTRUMENTATION, calculate=False)
+        generators.append(generator)
+
+    for cls in GENERATORS.values():
+        members = [generator for generator in generators if type(generator) is cls]
+        if not members:
+            continue
+        weights = {key: np.array([g.weights[key] if g.weights[key] is not None else np.nan for g in members],
+                                 dtype=np.float64) for key in members[0].weights}
+        reductions = {key: np.array([g.reductions[key] for g in members], dtype=np.float64)
+                      for key in members[0].reductions}
+        batch = _calculate_weights_array(cls.WEIGHT_SOURCES, weights, reductions, plates, cls.ROUNDING_VALUE)
+        for index, generator in enumerate(members):
+            generator.calculated_weights = batch.calculated_weights(index)
+
+    return generators
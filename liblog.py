@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+
+import csv
+import datetime
+import json
+import os
+from collections import deque
+from typing import Optional
+
+from libwendler import OneRMFormula, _formula, estimate_1rm
+
+LIFTS = ['squat', 'bench', 'deadlift', 'press']
+
+class E1RMIndex:
+    """
+    A per-(athlete, lift) index of estimated 1RMs, built incrementally from CSV training logs.
+
+    Logs are CSV files with athlete, lift, weight and reps columns and an optional ISO
+    date column, one row per set, appended in date order. For each athlete and lift the
+    index keeps the all-time best e1RM and the best within a rolling window of days.
+    It remembers how far into each log it has read, so ingesting a log again only
+    reads the rows appended since.
+
+    Args:
+        method (OneRMFormula): The formula used to estimate each set's 1RM, or its value or name.
+        window_days (int): Length of the rolling window, in days.
+    """
+
+    def __init__(self, method: OneRMFormula = OneRMFormula.BRZYCKI, window_days: int = 90):
+        self.method = _formula(method)
+        self.window_days = window_days
+
+        # athlete -> lift -> {"best": e1rm, "best_date": date, "window": deque([[date, e1rm], ...])}
+        self.entries = {}
+
+        # absolute log path -> bytes already ingested
+        self.offsets = {}
+
+    def ingest(self, path: str, chunk_size: int = 1 << 20) -> int:
+        """
+        Read the rows of a log that have not been ingested yet.
+
+        A trailing row without a newline is left for the next call, in case it is
+        still being written. If the log shrank since the last call it is read again
+        from the start.
+
+        Args:
+            path (str): Path to the CSV log.
+            chunk_size (int): Bytes to read at a time.
+
+        Returns:
+            int: The number of sets added to the index.
+        """
+        key = os.path.abspath(path)
+        offset = self.offsets.get(key, 0)
+        if offset > os.path.getsize(key):
+            offset = 0
+
+        added = 0
+        with open(key, "rb") as f:
+            header_line = f.readline()
+            if not header_line.endswith(b"\n"):
+                return 0
+            columns = next(csv.reader([header_line.decode()]))
+            offset = max(offset, f.tell())
+            f.seek(offset)
+
+            carry = b""
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                buffer = carry + chunk
+                end = buffer.rfind(b"\n") + 1
+                carry = buffer[end:]
+                if end:
+                    added += self._ingest_lines(columns, buffer[:end].decode().splitlines())
+                    offset += end
+
+        self.offsets[key] = offset
+        return added
+
+    def _ingest_lines(self, columns: list, lines: list) -> int:
+        added = 0
+        for row in csv.DictReader(lines, fieldnames=columns):
+            try:
+                lift = row['lift'].strip().lower()
+                if not lift:
+                    continue
+                e1rm = estimate_1rm(float(row['weight']), int(row['reps']), method=self.method)
+                self.update(row['athlete'], lift, e1rm, row.get('date') or None)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue  # Skip malformed sets rather than abandoning the log
+            added += 1
+        return added
+
+    def update(self, athlete: str, lift: str, e1rm: float, date: Optional[str] = None):
+        """
+        Add a single estimated 1RM to the index.
+
+        Args:
+            athlete (str): The athlete id.
+            lift (str): The lift name.
+            e1rm (float): The estimated 1RM.
+            date (Optional[str]): ISO date of the set. Undated sets only count toward the best.
+
+        Raises:
+            ValueError: If the date is not an ISO date. The index is left unchanged.
+        """
+        # Parse the date before touching the entry, so a bad date cannot leave it half-updated
+        cutoff = None
+        if date is not None:
+            cutoff = (datetime.date.fromisoformat(date) - datetime.timedelta(days=self.window_days)).isoformat()
+
+        entry = self.entries.setdefault(athlete, {}).setdefault(lift, {"best": None, "best_date": None, "window": deque()})
+
+        if entry["best"] is None or e1rm > entry["best"]:
+            entry["best"], entry["best_date"] = e1rm, date
+
+        if cutoff is None:
+            return
+
+        # Keep the window as a queue of decreasing e1RMs: an older, lighter set can
+        # never be the window's best again once a heavier later set exists.
+        window = entry["window"]
+        while window and window[-1][1] <= e1rm:
+            window.pop()
+        window.append([date, e1rm])
+
+        while window[0][0] < cutoff:
+            window.popleft()
+
+    def best(self, athlete: str, lift: str) -> Optional[float]:
+        """
+        The all-time best e1RM for an athlete's lift, or None if there is none.
+        """
+        return self.entries.get(athlete, {}).get(lift, {}).get("best")
+
+    def rolling_best(self, athlete: str, lift: str) -> Optional[float]:
+        """
+        The best e1RM within the rolling window ending at the lift's latest dated set.
+        """
+        window = self.entries.get(athlete, {}).get(lift, {}).get("window")
+        return window[0][1] if window else None
+
+    def maxes(self, athlete: str, rolling: bool = False) -> dict:
+        """
+        The e1RMs for every lift an athlete has logged.
+
+        Args:
+            athlete (str): The athlete id.
+            rolling (bool): Use the rolling-window best instead of the all-time best.
+
+        Returns:
+            dict: Lift name -> e1RM, with the main lifts first in their usual order.
+
+        Raises:
+            KeyError: If the athlete has no logged sets.
+        """
+        lifts = self.entries[athlete]
+        ordered = [lift for lift in LIFTS if lift in lifts] + [lift for lift in lifts if lift not in LIFTS]
+        values = {lift: self.rolling_best(athlete, lift) if rolling else self.best(athlete, lift) for lift in ordered}
+        return {lift: value for lift, value in values.items() if value is not None}
+
+    def save(self, path: str):
+        """
+        Write the index, including log offsets, to a JSON file.
+        """
+        entries = {athlete: {lift: dict(entry, window=list(entry["window"])) for lift, entry in lifts.items()}
+                   for athlete, lifts in self.entries.items()}
+        state = {"method": self.method.value, "window_days": self.window_days,
+                 "offsets": self.offsets, "entries": entries}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "E1RMIndex":
+        """
+        Read an index written by save().
+        """
+        with open(path, "r") as f:
+            state = json.load(f)
+        index = cls(OneRMFormula(state["method"]), state["window_days"])
+        index.offsets = state["offsets"]
+        index.entries = state["entries"]
+        for lifts in index.entries.values():
+            for entry in lifts.values():
+                entry["window"] = deque(entry["window"])
+        return index
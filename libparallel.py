@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from libcache import PlanCache
+from libplan import Renderer, TextRenderer
+from libplates import PlateEngine
+from libroster import RosterError, RosterStats, generate_roster, read_roster
+
+# Per worker process state, set up once by _init_worker
+_worker = {}
+
+def shard_bounds(total: int, shard_index: int, shard_count: int) -> Tuple[int, int]:
+    """
+    The [start, stop) row range of one shard when total rows are split into contiguous slices.
+
+    Slices differ in size by at most one row, and concatenating the shards in index
+    order gives back every row in its original order.
+
+    Raises:
+        ValueError: If the shard index is not within the shard count.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} is outside 0..{shard_count - 1}.")
+    return total * shard_index // shard_count, total * (shard_index + 1) // shard_count
+
+def shard_roster(path: str, shard_index: int, shard_count: int) -> Iterator[Tuple[int, object]]:
+    """
+    Read one contiguous shard of a roster file.
+
+    The file is read once to count its rows, so every node that reads the same file
+    with the same shard count agrees on the boundaries without coordinating.
+
+    Args:
+        path (str): A roster file accepted by read_roster().
+        shard_index (int): Which shard to read, from 0.
+        shard_count (int): How many shards the roster is split into.
+
+    Yields:
+        Tuple[int, object]: The (line number, row) pairs of the shard.
+    """
+    total = sum(1 for _ in read_roster(path))
+    start, stop = shard_bounds(total, shard_index, shard_count)
+    yield from itertools.islice(read_roster(path), start, stop)
+
+def _chunks(rows: Iterable, chunk_size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _init_worker(renderer: Renderer, plates: Optional[PlateEngine], cache_size: int):
+    _worker["renderer"] = renderer
+    _worker["plates"] = plates
+    _worker["cache"] = PlanCache(cache_size) if cache_size else None
+
+def _render_chunk(chunk: list) -> Tuple[str, int, List[RosterError]]:
+    errors = []
+    outputs = list(generate_roster(chunk, _worker["renderer"], errors.append, _worker["plates"], _worker["cache"]))
+    return "".join(outputs), len(outputs), errors
+
+def run_parallel(rows: Iterable[Tuple[int, object]], sink,
+                 renderer: Optional[Renderer] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: int = 1000,
+                 window: Optional[int] = None,
+                 on_error: Optional[Callable[[RosterError], None]] = None,
+                 plates: Optional[PlateEngine] = None,
+                 cache_size: int = 4096,
+                 preamble: bool = True) -> RosterStats:
+    """
+    Stream plans for a roster to a sink, generating chunks of rows on a process pool.
+
+    Chunks are written in submission order, so the output is byte-for-byte what
+    run_roster() produces for the same rows. At most `window` chunks are in flight or
+    waiting to be written: when the sink falls behind, no more rows are read or
+    submitted until the oldest chunk has been written.
+
+    Args:
+        rows (Iterable[Tuple[int, object]]): (line number, row) pairs, e.g. from read_roster().
+        sink: File-like object to write to.
+        renderer (Optional[Renderer]): How to render each plan (default: TextRenderer).
+        workers (Optional[int]): Worker processes (default: one per CPU).
+        chunk_size (int): Rows per task sent to a worker.
+        window (Optional[int]): Maximum chunks in flight (default: twice the workers).
+        on_error (Optional[Callable]): Called with a RosterError for each rejected row, in
+            roster order (default: print to stderr).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        cache_size (int): Size of each worker's PlanCache; 0 disables caching.
+        preamble (bool): Write the renderer's preamble, e.g. the CSV header, first.
+
+    Returns:
+        RosterStats: How many plans were written and rows rejected.
+    """
+    renderer = renderer or TextRenderer()
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    on_error = on_error or (lambda error: print(error, file=sys.stderr))
+    stats = RosterStats()
+
+    if preamble:
+        sink.write(renderer.preamble())
+
+    def write(result: Tuple[str, int, List[RosterError]]):
+        output, plans, errors = result
+        sink.write(output)
+        stats.plans += plans
+        stats.errors += len(errors)
+        for error in errors:
+            on_error(error)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(renderer, plates, cache_size)) as pool:
+        pending = deque()
+        for chunk in _chunks(rows, chunk_size):
+            if len(pending) >= window:
+                write(pending.popleft().result())
+            pending.append(pool.submit(_render_chunk, chunk))
+        while pending:
+            write(pending.popleft().result())
+
+    return stats
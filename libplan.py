@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+
+import csv
+import io
+import json
+from typing import Callable, List, Optional
+
+class Set:
+    """
+    A single prescription line within a lift, e.g. "Set 1: 5 reps @ 87.5 kg (65%)".
+
+    Args:
+        kind (str): The kind of set ("working", "fsl", "widowmaker", "pyramid" or "hlm").
+        sets (int): How many times the set is performed.
+        reps (str): The rep target, kept as text so "5+" and "1-5" survive.
+        weight (float): The prescribed weight.
+        percent (Optional[float]): Fraction of the training max, when known.
+        note (Optional[str]): Trailing note, e.g. "4x5 Backoff".
+        plates (Optional[tuple]): Plates to load on each side of the bar, when a
+            PlateEngine was used.
+    """
+
+    __slots__ = ("kind", "sets", "reps", "weight", "percent", "note", "plates")
+
+    def __init__(self, kind: str, sets: int, reps: str, weight: float,
+                 percent: Optional[float] = None, note: Optional[str] = None,
+                 plates: Optional[tuple] = None):
+        self.kind = kind
+        self.sets = sets
+        self.reps = reps
+        self.weight = weight
+        self.percent = percent
+        self.note = note
+        self.plates = plates
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class Lift:
+    """
+    A lift within a week, holding its sets in prescription order.
+
+    Args:
+        name (str): The lift name as it should be displayed.
+        sets (List[Set]): The sets for this lift.
+        day (Optional[str]): The training day, for programs that schedule by day.
+    """
+
+    __slots__ = ("name", "sets", "day")
+
+    def __init__(self, name: str, sets: List[Set], day: Optional[str] = None):
+        self.name = name
+        self.sets = sets
+        self.day = day
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "day": self.day, "sets": [s.to_dict() for s in self.sets]}
+
+class Week:
+    """
+    A training week.
+
+    Args:
+        number (int): The week number, starting at 1.
+        name (str): The week name, e.g. "Week 1 (5/5/5+)".
+        lifts (List[Lift]): The lifts trained this week, in order.
+    """
+
+    __slots__ = ("number", "name", "lifts")
+
+    def __init__(self, number: int, name: str, lifts: List[Lift]):
+        self.number = number
+        self.name = name
+        self.lifts = lifts
+
+    def to_dict(self) -> dict:
+        return {"number": self.number, "name": self.name, "lifts": [l.to_dict() for l in self.lifts]}
+
+class Plan:
+    """
+    A computed training plan, independent of how it is rendered.
+
+    Args:
+        family (str): The generator family ("wendler" or "hlm").
+        title (str): The plan title line.
+        maxes (dict): Input or training maxes, keyed by lift name.
+        weeks (List[Week]): The weeks of the plan.
+        header_text (Optional[str]): Free text shown under the title.
+        reductions (Optional[dict]): Intensity reductions, for programs that display them.
+        athlete (Optional[str]): The athlete the plan was generated for, when known.
+    """
+
+    __slots__ = ("family", "title", "maxes", "weeks", "header_text", "reductions", "athlete")
+
+    def __init__(self, family: str, title: str, maxes: dict, weeks: List[Week],
+                 header_text: Optional[str] = None, reductions: Optional[dict] = None,
+                 athlete: Optional[str] = None):
+        self.family = family
+        self.title = title
+        self.maxes = maxes
+        self.weeks = weeks
+        self.header_text = header_text
+        self.reductions = reductions
+        self.athlete = athlete
+
+    def to_dict(self) -> dict:
+        return {
+            "athlete": self.athlete,
+            "family": self.family,
+            "title": self.title,
+            "header_text": self.header_text,
+            "maxes": self.maxes,
+            "reductions": self.reductions,
+            "weeks": [w.to_dict() for w in self.weeks],
+        }
+
+def exact_items(values: dict) -> tuple:
+    """
+    A hashable form of a mapping that tells apart every value a renderer prints differently,
+    e.g. 50 from 50.0, by keying on each value's repr.
+    """
+    return tuple((key, repr(value)) for key, value in values.items())
+
+def plates_text(plates: Optional[tuple]) -> str:
+    """
+    Format a per-side plate breakdown as a line suffix, e.g. " [25 + 10 + 2.5 /side]".
+    """
+    if plates is None:
+        return ""
+    return f" [{' + '.join(f'{p:g}' for p in plates) or 'empty bar'} /side]"
+
+def hlm_line(lift: Lift) -> str:
+    """
+    Format an HLM lift as a single schedule line, e.g. "Heavy Squat 1x1-5 - 140.0 kg, 4x5 Backoff".
+    """
+    s = lift.sets[0]
+    line = f"{lift.name} {s.sets}x{s.reps} - {s.weight} kg"
+    line = f"{line}, {s.note}" if s.note else line
+    return line + plates_text(s.plates)
+
+class Renderer:
+    """
+    Base class for plan renderers. Subclasses implement body() and frame() and, if the
+    output needs one, preamble(). Rendering builds the whole output in memory and writes
+    it to the sink in a single call.
+
+    The body of a plan never depends on the athlete, so plans shared between athletes
+    can be rendered once and framed per athlete.
+    """
+
+    def preamble(self) -> str:
+        """
+        Text written once before any plans, e.g. a CSV header row.
+        """
+        return ""
+
+    def body(self, plan: Plan) -> str:
+        """
+        Render everything about a plan except its athlete.
+        """
+        raise NotImplementedError
+
+    def frame(self, body: str, athlete: Optional[str]) -> str:
+        """
+        Attach an athlete to a rendered body.
+        """
+        raise NotImplementedError
+
+    def lift_body(self, plan: Plan, week: Week, lift: Lift) -> str:
+        """
+        Render one lift of one week, for renderers whose bodies are built lift by lift.
+        """
+        raise NotImplementedError
+
+    def compose(self, plan: Plan, lift_body: Callable[[Plan, Week, Lift], str]) -> str:
+        """
+        Render a plan's body taking each lift's text from lift_body(plan, week, lift), so
+        callers can reuse the text of lifts that have not changed. Renderers whose output
+        cannot be split by lift render the whole body.
+        """
+        return self.body(plan)
+
+    def format(self, plan: Plan) -> str:
+        return self.frame(self.body(plan), plan.athlete)
+
+    def render(self, plan: Plan, sink) -> None:
+        """
+        Render a plan to any file-like object with a write() method.
+        """
+        sink.write(self.preamble() + self.format(plan))
+
+class TextRenderer(Renderer):
+    """
+    Renders plans as the human-readable text the generators have always printed.
+    """
+
+    def body(self, plan: Plan) -> str:
+        return self.compose(plan, self.lift_body)
+
+    def compose(self, plan: Plan, lift_body: Callable[[Plan, Week, Lift], str]) -> str:
+        parts = []
+        if plan.family == "hlm":
+            self._format_hlm(plan, parts, lift_body)
+        else:
+            self._format_wendler(plan, parts, lift_body)
+        return "".join(parts)
+
+    def lift_body(self, plan: Plan, week: Week, lift: Lift) -> str:
+        if plan.family == "hlm":
+            return f"  {hlm_line(lift)}\n"
+
+        text = f"  {lift.name}:\n"
+        working = 0
+        for s in lift.sets:
+            if s.kind == "working":
+                working += 1
+                text += f"    Set {working}: {s.reps} reps @ {s.weight:.1f} kg ({s.percent*100:.0f}%){plates_text(s.plates)}\n"
+            elif s.kind == "widowmaker":
+                text += f"    WIDOWMAKER: {s.reps} @ {s.weight:.1f} kg{plates_text(s.plates)}\n"
+            elif s.kind == "pyramid":
+                text += f"    PYRAMID: {s.reps} reps @ {s.weight:.1f} kg{plates_text(s.plates)}\n"
+            else:
+                # FSL, and any supplemental kind a declarative template introduces
+                text += f"    {s.kind.upper()}: {s.sets} x {s.reps} @ {s.weight:.1f} kg{plates_text(s.plates)}\n"
+        return text
+
+    def frame(self, body: str, athlete: Optional[str]) -> str:
+        if athlete is None:
+            return body
+        # Separate consecutive plans in a roster stream
+        return f"Athlete: {athlete}\n\n{body}\n"
+
+    def _format_wendler(self, plan: Plan, parts: list, lift_body: Callable):
+        parts.append(f"{plan.title}\n")
+        if plan.header_text:
+            parts.append(f"{plan.header_text}\n")
+
+        parts.append("\nTraining Maxes:\n")
+        for lift, tm in plan.maxes.items():
+            parts.append(f"  {lift.title()}: {tm:.2f} kgs\n")
+
+        for week in plan.weeks:
+            parts.append(f"\n{week.name}:\n")
+            for lift in week.lifts:
+                parts.append(lift_body(plan, week, lift))
+
+    def _format_hlm(self, plan: Plan, parts: list, lift_body: Callable):
+        parts.append(f"{plan.title}\n\n")
+
+        parts.append("Weights:\n")
+        for exercise, weight in plan.maxes.items():
+            parts.append(f"  {exercise.title()} (5s) - {weight} kg\n")
+
+        if plan.reductions is not None:
+            parts.append("\nReductions:\n")
+            for reduction, value in plan.reductions.items():
+                parts.append(f"  {reduction.title()} Reduction - {value * 100}%\n")
+            parts.append("\n" + (plan.header_text if plan.header_text else ""))
+        parts.append("\n")
+
+        days = {}
+        for week in plan.weeks:
+            for lift in week.lifts:
+                days.setdefault(lift.day, []).append(lift_body(plan, week, lift))
+        for day, lines in days.items():
+            parts.append(f"{day}:\n")
+            parts.extend(lines)
+            parts.append("\n")
+
+class JSONRenderer(Renderer):
+    """
+    Renders each plan as one line of JSON, so several plans form a JSON Lines stream.
+    """
+
+    def body(self, plan: Plan) -> str:
+        data = plan.to_dict()
+        del data["athlete"]
+        return json.dumps(data) + "\n"
+
+    def frame(self, body: str, athlete: Optional[str]) -> str:
+        return f'{{"athlete": {json.dumps(athlete)}, {body[1:]}'
+
+class CSVRenderer(Renderer):
+    """
+    Renders plans as one CSV row per set.
+    """
+
+    COLUMNS = ["athlete", "week", "week_name", "day", "lift", "kind", "sets", "reps", "weight", "percent", "note", "plates"]
+
+    def preamble(self) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.COLUMNS)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _rows(week: Week, lift: Lift):
+        return (
+            (week.number, week.name, lift.day, lift.name, s.kind, s.sets, s.reps, s.weight, s.percent, s.note,
+             " ".join(f"{p:g}" for p in s.plates) if s.plates is not None else None)
+            for s in lift.sets
+        )
+
+    def body(self, plan: Plan) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for week in plan.weeks:
+            for lift in week.lifts:
+                writer.writerows(self._rows(week, lift))
+        return buffer.getvalue()
+
+    def lift_body(self, plan: Plan, week: Week, lift: Lift) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self._rows(week, lift))
+        return buffer.getvalue()
+
+    def compose(self, plan: Plan, lift_body: Callable[[Plan, Week, Lift], str]) -> str:
+        return "".join(lift_body(plan, week, lift) for week in plan.weeks for lift in week.lifts)
+
+    def frame(self, body: str, athlete: Optional[str]) -> str:
+        # Plan fields never contain newlines, so every line of the body is one row.
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow([athlete, ""])
+        prefix = buffer.getvalue()
+        return "".join(prefix + row for row in body.splitlines(keepends=True))
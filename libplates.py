@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+# Total plates of each weight (kg) in a typical commercial gym, used in pairs.
+DEFAULT_PLATES = {25: 8, 20: 4, 15: 4, 10: 4, 5: 4, 2.5: 4, 1.25: 4}
+
+# Loads are indexed in integer hundredths of a kg so float error cannot split equal loads.
+_SCALE = 100
+
+class PlateEngine:
+    """
+    Snaps prescribed weights to loads a barbell can actually be loaded to.
+
+    Every achievable load for the bar and plate inventory is computed once, along with
+    the fewest-plates breakdown for one side of the bar, and kept in a sorted index.
+    Each lookup is then a bisect over that index.
+
+    Args:
+        bar_weight (float): The weight of the empty bar (default: 20.0).
+        plates (Optional[Dict[float, int]]): Total count of each plate weight in the
+            inventory (default: DEFAULT_PLATES). Plates are loaded in pairs.
+    """
+
+    def __init__(self, bar_weight: float = 20.0, plates: Optional[Dict[float, int]] = None):
+        self.bar_weight = bar_weight
+        self.plates = dict(plates if plates is not None else DEFAULT_PLATES)
+
+        for plate, count in self.plates.items():
+            if plate <= 0 or count < 0:
+                raise ValueError(f"Invalid plate inventory entry: {plate} x {count}.")
+
+        # side load -> fewest-plates breakdown, built up one plate size at a time (heaviest first)
+        sides = {0: ()}
+        for plate in sorted(self.plates, reverse=True):
+            units = round(plate * _SCALE)
+            pairs = self.plates[plate] // 2
+            expanded = dict(sides)
+            for side, breakdown in sides.items():
+                for n in range(1, pairs + 1):
+                    load = side + n * units
+                    candidate = breakdown + (plate,) * n
+                    if load not in expanded or len(candidate) < len(expanded[load]):
+                        expanded[load] = candidate
+            sides = expanded
+
+        bar_units = round(bar_weight * _SCALE)
+        index = sorted((bar_units + 2 * side, breakdown) for side, breakdown in sides.items())
+
+        self.loads = [units / _SCALE for units, _ in index]
+        self.breakdowns = [breakdown for _, breakdown in index]
+        self._loads_array = None
+
+    def cache_key(self) -> tuple:
+        """
+        A hashable key identifying this bar and inventory. Engines with equal keys snap
+        every weight identically.
+        """
+        return (self.bar_weight, tuple(sorted(self.plates.items())))
+
+    def _index(self, weight: float) -> int:
+        """
+        Position of the nearest achievable load, preferring the lighter load on a tie.
+        """
+        i = bisect_left(self.loads, weight)
+        if i == 0:
+            return 0
+        if i == len(self.loads):
+            return i - 1
+        return i - 1 if weight - self.loads[i - 1] <= self.loads[i] - weight else i
+
+    def snap(self, weight: float) -> float:
+        """
+        Snap a weight to the nearest achievable load.
+
+        Args:
+            weight (float): The prescribed weight.
+
+        Returns:
+            float: The nearest load the bar can be loaded to.
+        """
+        return self.loads[self._index(weight)]
+
+    def load(self, weight: float) -> Tuple[float, Tuple[float, ...]]:
+        """
+        Snap a weight and return it with the plates to load on each side.
+
+        Args:
+            weight (float): The prescribed weight.
+
+        Returns:
+            Tuple[float, Tuple[float, ...]]: The achievable load and its per-side plates, heaviest first.
+        """
+        i = self._index(weight)
+        return self.loads[i], self.breakdowns[i]
+
+    def plates_for(self, weight: float) -> Tuple[float, ...]:
+        """
+        The per-side plates for the load nearest to a weight.
+        """
+        return self.breakdowns[self._index(weight)]
+
+    def snap_array(self, weights):
+        """
+        Snap an array of weights to achievable loads in one vectorized lookup.
+
+        Args:
+            weights (numpy.ndarray): Prescribed weights of any shape. NaNs are preserved.
+
+        Returns:
+            numpy.ndarray: The nearest achievable loads, with the same shape.
+        """
+        import numpy as np
+
+        if self._loads_array is None:
+            self._loads_array = np.asarray(self.loads, dtype=np.float64)
+        loads = self._loads_array
+
+        weights = np.asarray(weights, dtype=np.float64)
+        upper = np.clip(np.searchsorted(loads, weights, side="left"), 1, len(loads) - 1)
+        lower = upper - 1
+        if len(loads) == 1:
+            upper = lower = np.zeros_like(upper)
+        use_lower = (weights - loads[lower]) <= (loads[upper] - weights)
+        snapped = np.where(use_lower, loads[lower], loads[upper])
+        return np.where(np.isnan(weights), np.nan, snapped)
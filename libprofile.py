@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+
+import json
+import sys
+import time
+from typing import Callable, Dict
+
+class PhaseStats:
+    """
+    Accumulated timings for one named phase.
+
+    Attributes:
+        wall (float): Total wall-clock seconds.
+        cpu (float): Total process CPU seconds.
+        calls (int): How many times the phase ran.
+    """
+
+    __slots__ = ("wall", "cpu", "calls")
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.calls = 0
+
+    def to_dict(self) -> dict:
+        return {"wall": self.wall, "cpu": self.cpu, "calls": self.calls}
+
+class _Phase:
+    __slots__ = ("stats", "wall", "cpu")
+
+    def __init__(self, stats: PhaseStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.wall += time.perf_counter() - self.wall
+        self.stats.cpu += time.process_time() - self.cpu
+        self.stats.calls += 1
+        return False
+
+class Instrumentation:
+    """
+    Opt-in per-phase wall/CPU timing and call counts for generation runs.
+
+    Pass an instance as `instrument=` to the generators; each one times its phases
+    (config loading, training max calculation, rounding, building, rendering and
+    writing) into it. One instance can be shared across many generators to profile
+    a whole roster run.
+
+    Args:
+        memory (bool): Also trace memory allocations with tracemalloc and report the peak.
+    """
+
+    enabled = True
+
+    def __init__(self, memory: bool = False):
+        self.phases: Dict[str, PhaseStats] = {}
+        self.memory = memory
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def phase(self, name: str) -> _Phase:
+        """
+        A context manager that times one run of the named phase.
+        """
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return _Phase(stats)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap a function so every call is timed as the named phase.
+        """
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def stats(self) -> dict:
+        """
+        The collected timings, keyed by phase, plus the traced memory peak when enabled.
+        """
+        result = {"phases": {name: stats.to_dict() for name, stats in self.phases.items()}}
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.stats(), indent=2)
+
+    def dump(self, path: str = "-"):
+        """
+        Write the stats as JSON to a file, or to stderr for "-".
+        """
+        if path == "-":
+            sys.stderr.write(self.to_json() + "\n")
+        else:
+            with open(path, "w") as f:
+                f.write(self.to_json() + "\n")
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class _NullInstrumentation:
+    """
+    The disabled instrumentation: every phase is a shared no-op context manager.
+    """
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name: str) -> _NullPhase:
+        return self._phase
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def stats(self) -> dict:
+        return {"phases": {}}
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
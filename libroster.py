@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+
+import csv
+import json
+import sys
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from libcache import PlanCache
+from libconfig import load_documents
+from libhlm import generator_from_config
+from libplan import Plan, Renderer, TextRenderer
+from libplates import PlateEngine
+from libwendler import WendlerBasic531Generator, Template, MaxType
+
+# Fields that arrive as text from CSV rosters and need converting before use.
+WENDLER_NUMERIC_FIELDS = ("squat", "bench", "deadlift", "press", "tm_percentage")
+HLM_NUMERIC_FIELDS = ("squat", "pull", "press", "primary_press", "secondary_press",
+                      "medium_pull", "light_pull", "medium_reduction", "light_reduction")
+
+class RosterError:
+    """
+    A roster row that could not be turned into a plan.
+
+    Args:
+        line (int): The line number of the row in the roster file.
+        athlete (Optional[str]): The athlete id, if the row had one.
+        message (str): Why the row was rejected.
+    """
+
+    __slots__ = ("line", "athlete", "message")
+
+    def __init__(self, line: int, athlete: Optional[str], message: str):
+        self.line = line
+        self.athlete = athlete
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"line {self.line} ({self.athlete or 'unknown athlete'}): {self.message}"
+
+class RosterStats:
+    """
+    Counts of plans written and rows rejected by run_roster().
+    """
+
+    __slots__ = ("plans", "errors")
+
+    def __init__(self):
+        self.plans = 0
+        self.errors = 0
+
+def read_roster(path: str) -> Iterator[Tuple[int, object]]:
+    """
+    Lazily read athletes from a CSV, JSONL or multi-document YAML roster file.
+
+    Rows that cannot be parsed, or that are not mappings (e.g. a JSON array line), are
+    yielded as a ValueError instead of a dict, so the caller can report them without stopping.
+
+    Args:
+        path (str): Path to a .csv, .yaml/.yml or .jsonl/.json file.
+
+    Yields:
+        Tuple[int, object]: The line (or YAML document) number and the row dict (or parse error).
+    """
+    if path.endswith((".yaml", ".yml")):
+        for number, document in enumerate(load_documents(path), start=1):
+            yield number, document if isinstance(document, dict) else _not_a_mapping(document)
+        return
+
+    with open(path, 'r', newline='') as f:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {k: v for k, v in row.items() if v not in ("", None)}
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_num, e
+                    continue
+                yield line_num, row if isinstance(row, dict) else _not_a_mapping(row)
+
+def _not_a_mapping(row) -> ValueError:
+    return ValueError(f"Expected an object of athlete fields, got {type(row).__name__}.")
+
+def _split(value) -> list:
+    if isinstance(value, str):
+        return [v.strip() for v in value.split("|") if v.strip()]
+    return list(value)
+
+def _parse_template(value):
+    if isinstance(value, Template):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"Template names must be text, got {value!r}.")
+    try:
+        return Template(value)
+    except ValueError:
+        pass
+    if value.upper() in Template.__members__:
+        return Template[value.upper()]
+    return value  # A template registered in libtemplates, validated by the generator
+
+def _parse_max_type(value) -> MaxType:
+    if isinstance(value, MaxType):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"max_type must be text, got {value!r}.")
+    try:
+        return MaxType(value)
+    except ValueError:
+        return MaxType[value.upper()]
+
+def _parse_fsl_params(value) -> dict:
+    if isinstance(value, str):
+        # CSV rosters give FSL params as "<sets>x<reps>", e.g. "5x5"
+        sets, reps = value.lower().split("x")
+        return {'sets': int(sets), 'reps': int(reps)}
+    if not isinstance(value, dict):
+        raise ValueError(f"fsl_params must be <sets>x<reps> or a mapping of sets and reps, got {value!r}.")
+    return value
+
+def wendler_from_row(row: dict, plates: Optional[PlateEngine] = None, instrument=None) -> WendlerBasic531Generator:
+    """
+    Create a WendlerBasic531Generator from a roster row.
+
+    Args:
+        row (dict): The lift maxes plus optional active_lifts, templates, fsl_params,
+            max_type, tm_percentage and header_text.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
+
+    Returns:
+        WendlerBasic531Generator: The configured generator.
+    """
+    kwargs = {field: float(row[field]) for field in WENDLER_NUMERIC_FIELDS if field in row}
+    if "active_lifts" in row:
+        kwargs["active_lifts"] = _split(row["active_lifts"])
+    if "templates" in row:
+        kwargs["templates"] = [_parse_template(t) for t in _split(row["templates"])]
+    if "fsl_params" in row:
+        kwargs["fsl_params"] = _parse_fsl_params(row["fsl_params"])
+    if "max_type" in row:
+        kwargs["max_type"] = _parse_max_type(row["max_type"])
+    if "header_text" in row:
+        kwargs["header_text"] = row["header_text"]
+    return WendlerBasic531Generator(plates=plates, instrument=instrument, **kwargs)
+
+def hlm_from_row(row: dict, plates: Optional[PlateEngine] = None, instrument=None):
+    """
+    Create an HLM generator from a roster row carrying the same fields as hlm.yaml.
+    """
+    config = dict(row)
+    for field in HLM_NUMERIC_FIELDS:
+        if isinstance(config.get(field), str):
+            config[field] = float(config[field])
+    return generator_from_config(config, plates, instrument)
+
+def athlete_id(row: dict, line: int) -> str:
+    """
+    The athlete id of a roster row: its `athlete` or `id` field, else its line number.
+    """
+    athlete = row.get("athlete", row.get("id"))
+    return str(athlete) if athlete is not None else str(line)
+
+def generator_from_row(row: dict, plates: Optional[PlateEngine] = None):
+    """
+    Create the generator for a roster row: HLM when it names a `generator:`, Wendler otherwise.
+    """
+    return hlm_from_row(row, plates) if row.get("generator") else wendler_from_row(row, plates)
+
+def generate_roster(rows: Iterable[Tuple[int, object]],
+                    renderer: Optional[Renderer] = None,
+                    on_error: Optional[Callable[[RosterError], None]] = None,
+                    plates: Optional[PlateEngine] = None,
+                    cache: Optional[PlanCache] = None) -> Iterator[str]:
+    """
+    Build and render one plan per roster row, one at a time.
+
+    Args:
+        rows (Iterable[Tuple[int, object]]): (line number, row) pairs, e.g. from read_roster().
+        renderer (Optional[Renderer]): How to render each plan (default: TextRenderer).
+        on_error (Optional[Callable]): Called with a RosterError for each rejected row
+            (default: print to stderr).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        cache (Optional[PlanCache]): Reuse plans and renderings across identical athletes.
+
+    Yields:
+        str: The rendered plan for each valid row.
+    """
+    renderer = renderer or TextRenderer()
+
+    def render(generator, athlete: str) -> str:
+        if cache is not None:
+            return cache.render(generator, renderer, athlete)
+        plan = generator.build_plan()
+        plan.athlete = athlete
+        return renderer.format(plan)
+
+    return _process_roster(rows, render, on_error, plates)
+
+def build_roster(rows: Iterable[Tuple[int, object]],
+                 on_error: Optional[Callable[[RosterError], None]] = None,
+                 plates: Optional[PlateEngine] = None,
+                 cache: Optional[PlanCache] = None) -> Iterator[Tuple[str, Plan]]:
+    """
+    Build one plan per roster row, one at a time, without rendering.
+
+    Args:
+        rows (Iterable[Tuple[int, object]]): (line number, row) pairs, e.g. from read_roster().
+        on_error (Optional[Callable]): Called with a RosterError for each rejected row
+            (default: print to stderr).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        cache (Optional[PlanCache]): Reuse plans across identical athletes. Cached plans are
+            shared, so their athlete field is not set.
+
+    Yields:
+        Tuple[str, Plan]: The athlete id and plan for each valid row.
+    """
+    def build(generator, athlete: str) -> Tuple[str, Plan]:
+        if cache is not None:
+            return athlete, cache.plan(generator)
+        plan = generator.build_plan()
+        plan.athlete = athlete
+        return athlete, plan
+
+    return _process_roster(rows, build, on_error, plates)
+
+def _process_roster(rows: Iterable[Tuple[int, object]], process: Callable,
+                    on_error: Optional[Callable[[RosterError], None]],
+                    plates: Optional[PlateEngine]) -> Iterator:
+    on_error = on_error or (lambda error: print(error, file=sys.stderr))
+
+    for line, row in rows:
+        if not isinstance(row, (dict, Exception)):
+            row = _not_a_mapping(row)
+        if isinstance(row, Exception):
+            on_error(RosterError(line, None, str(row)))
+            continue
+
+        athlete = athlete_id(row, line)
+        try:
+            output = process(generator_from_row(row, plates), athlete)
+        except (ValueError, TypeError, KeyError) as e:
+            on_error(RosterError(line, athlete, str(e)))
+            continue
+
+        yield output
+
+def run_roster(rows: Iterable[Tuple[int, object]], sink,
+               renderer: Optional[Renderer] = None,
+               buffer_size: int = 1 << 16,
+               on_error: Optional[Callable[[RosterError], None]] = None,
+               plates: Optional[PlateEngine] = None,
+               cache: Optional[PlanCache] = None,
+               preamble: bool = True) -> RosterStats:
+    """
+    Stream plans for a roster to a sink, holding at most buffer_size characters of output.
+
+    Args:
+        rows (Iterable[Tuple[int, object]]): (line number, row) pairs, e.g. from read_roster().
+        sink: File-like object to write to.
+        renderer (Optional[Renderer]): How to render each plan (default: TextRenderer).
+        buffer_size (int): Characters to accumulate before each write to the sink.
+        on_error (Optional[Callable]): Called with a RosterError for each rejected row
+            (default: print to stderr).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        cache (Optional[PlanCache]): Reuse plans and renderings across identical athletes.
+        preamble (bool): Write the renderer's preamble, e.g. the CSV header, first.
+
+    Returns:
+        RosterStats: How many plans were written and rows rejected.
+    """
+    renderer = renderer or TextRenderer()
+    stats = RosterStats()
+    report = on_error or (lambda error: print(error, file=sys.stderr))
+
+    def count_error(error: RosterError):
+        stats.errors += 1
+        report(error)
+
+    buffer, buffered = [renderer.preamble() if preamble else ""], 0
+    for output in generate_roster(rows, renderer, count_error, plates, cache):
+        stats.plans += 1
+        buffer.append(output)
+        buffered += len(output)
+        if buffered >= buffer_size:
+            sink.write("".join(buffer))
+            buffer, buffered = [], 0
+    sink.write("".join(buffer))
+
+    return stats
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+from typing import List, Optional
+
+from libplan import Plan, Renderer, Week, Lift
+
+# Segment key reported when the plan's title, maxes, reductions or header text change
+HEADER = "header"
+
+def _signature(segment: list) -> tuple:
+    return tuple(
+        (number, name, position, lift.name, lift.day,
+         tuple((s.kind, s.sets, s.reps, s.weight, s.percent, s.note, s.plates) for s in lift.sets))
+        for number, name, position, lift in segment
+    )
+
+def _header(plan: Plan) -> tuple:
+    return (plan.family, plan.title, plan.header_text, tuple(plan.maxes.items()),
+            tuple(plan.reductions.items()) if plan.reductions is not None else None)
+
+class SegmentedPlan:
+    """
+    A plan kept as per-lift segments, so changing one input rebuilds and re-renders
+    only the segments that depend on it.
+
+    Works with any generator providing segment_dependencies(), build_segment(key),
+    set_inputs(**inputs) and plan_from_weeks(weeks): Wendler segments are lifts,
+    depending on that lift's max; HLM segments are calculated weights, depending on
+    the config values that feed them.
+
+    Args:
+        generator: A Wendler or HLM generator. It is updated in place by update().
+        athlete (Optional[str]): The athlete to frame rendered output for.
+
+    Attributes:
+        plan (Plan): The current plan, assembled from the segments.
+    """
+
+    def __init__(self, generator, athlete: Optional[str] = None):
+        self.generator = generator
+        self.athlete = athlete
+        self.dependencies = generator.segment_dependencies()
+        self.segments = {key: generator.build_segment(key) for key in self.dependencies}
+
+        # id(Lift) -> {renderer type: rendered text}; the segments keep the lifts alive
+        self._fragments = {}
+        self.plan = self._assemble()
+
+    def _assemble(self) -> Plan:
+        weeks = {}
+        for segment in self.segments.values():
+            for number, name, position, lift in segment:
+                weeks.setdefault(number, (name, []))[1].append((position, lift))
+        plan = self.generator.plan_from_weeks([
+            Week(number, name, [lift for _, lift in sorted(lifts, key=lambda entry: entry[0])])
+            for number, (name, lifts) in sorted(weeks.items())
+        ])
+        plan.athlete = self.athlete
+        return plan
+
+    def update(self, **inputs) -> List[str]:
+        """
+        Change some inputs, e.g. update(press=65) or update(secondary_press=80), and
+        rebuild the segments that depend on them.
+
+        Returns:
+            List[str]: The keys of the segments whose content changed, in segment order,
+                plus HEADER if the plan's title, maxes, reductions or header text did.
+                Segments that were rebuilt but came out identical are not reported.
+        """
+        changed_inputs = self.generator.set_inputs(**inputs)
+
+        changed = []
+        for key, dependencies in self.dependencies.items():
+            if not dependencies & changed_inputs:
+                continue
+            segment = self.generator.build_segment(key)
+            if _signature(segment) == _signature(self.segments[key]):
+                continue
+            for _, _, _, lift in self.segments[key]:
+                self._fragments.pop(id(lift), None)
+            self.segments[key] = segment
+            changed.append(key)
+
+        previous = self.plan
+        self.plan = self._assemble()
+        if _header(self.plan) != _header(previous):
+            changed.append(HEADER)
+        return changed
+
+    def segment(self, key: str) -> List[Lift]:
+        """
+        The lifts of one segment, in week order, e.g. to push to clients after update().
+        """
+        return [lift for _, _, _, lift in self.segments[key]]
+
+    def render(self, renderer: Renderer) -> str:
+        """
+        Render the current plan, reusing the text of lifts unchanged since the last render.
+
+        Returns:
+            str: The same text renderer.format() would produce for the plan.
+        """
+        def lift_body(plan: Plan, week: Week, lift: Lift) -> str:
+            fragments = self._fragments.setdefault(id(lift), {})
+            text = fragments.get(type(renderer))
+            if text is None:
+                text = fragments[type(renderer)] = renderer.lift_body(plan, week, lift)
+            return text
+
+        return renderer.frame(renderer.compose(self.plan, lift_body), self.plan.athlete)
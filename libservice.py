@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from libplan import TextRenderer, JSONRenderer, CSVRenderer
+from libplates import PlateEngine
+from libroster import wendler_from_row, hlm_from_row
+
+RENDERERS = {
+    "text": (TextRenderer, "text/plain; charset=utf-8"),
+    "csv": (CSVRenderer, "text/csv; charset=utf-8"),
+    "json": (JSONRenderer, "application/json"),
+}
+
+BUILDERS = {
+    "/wendler": wendler_from_row,
+    "/hlm": hlm_from_row,
+}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+class PlanService:
+    """
+    An asyncio HTTP service that generates plans from JSON parameters.
+
+    POST /wendler or /hlm with a JSON object using the same fields as a roster row
+    (see libroster), and choose the output with ?format=json (default), text or csv.
+    Plans are built and rendered on a worker thread so the event loop keeps serving
+    other connections, and responses are cached by normalized parameters. Concurrent
+    identical requests share a single generation.
+
+    Args:
+        cache_size (int): Maximum number of cached responses (LRU eviction).
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+    """
+
+    def __init__(self, cache_size: int = 1024, plates: Optional[PlateEngine] = None):
+        self.cache_size = cache_size
+        self.plates = plates
+        self.cache = OrderedDict()
+        self._pending = {}
+
+    def _generate(self, path: str, fmt: str, params: dict) -> bytes:
+        plan = BUILDERS[path](params, self.plates).build_plan()
+        return RENDERERS[fmt][0]().format(plan).encode()
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """
+        Produce the response for one request.
+
+        Returns:
+            Tuple[int, str, bytes]: Status code, content type and body.
+        """
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, "text/plain", b"ok\n"
+        if url.path not in BUILDERS:
+            return 404, "text/plain", b"unknown endpoint\n"
+        if method != "POST":
+            return 405, "text/plain", b"use POST\n"
+
+        fmt = parse_qs(url.query).get("format", ["json"])[0]
+        if fmt not in RENDERERS:
+            return 400, "text/plain", f"unknown format: {fmt}\n".encode()
+
+        try:
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("parameters must be a JSON object")
+            key = (url.path, fmt, json.dumps(params, sort_keys=True))
+        except (ValueError, TypeError) as e:
+            return 400, "text/plain", f"{e}\n".encode()
+
+        content_type = RENDERERS[fmt][1]
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return 200, content_type, self.cache[key]
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.get_running_loop().run_in_executor(None, self._generate, url.path, fmt, params)
+            self._pending[key] = pending
+        try:
+            output = await pending
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, "text/plain", f"{e}\n".encode()
+        except Exception as e:
+            # Whatever a payload triggers, the client gets an answer and the connection survives
+            return 500, "text/plain", f"{type(e).__name__}: {e}\n".encode()
+        finally:
+            self._pending.pop(key, None)
+
+        self.cache[key] = output
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return 200, content_type, output
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, dict, bytes]]:
+        # (method, target, version, headers, body), or None once the client closed;
+        # ValueError if the request is malformed
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, version = request_line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, separator, value = line.decode("latin-1").partition(":")
+            if not separator:
+                raise ValueError(f"malformed header line: {line!r}")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"invalid content length: {length}")
+        body = await reader.readexactly(length)
+        return method, target, version, headers, body
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, content_type: str, payload: bytes,
+                       keep_alive: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    await self._respond(writer, 400, "text/plain", f"malformed request: {e}\n".encode(), False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+
+                status, content_type, payload = await self.handle(method, target, body)
+                keep_alive = (version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+                await self._respond(writer, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client went away mid-request
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8531) -> asyncio.AbstractServer:
+        """
+        Start listening. Pass port 0 to pick a free port (see server.sockets).
+        """
+        return await asyncio.start_server(self._client, host, port)
+
+def serve(host: str = "127.0.0.1", port: int = 8531, cache_size: int = 1024,
+          plates: Optional[PlateEngine] = None):
+    """
+    Run a PlanService until interrupted.
+    """
+    async def main():
+        server = await PlanService(cache_size, plates).start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/python3
+
+import functools
+import hashlib
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from typing import Iterator, Optional
+
+from libplan import Plan, Week, Lift, Set
+
+# A plan store file is a header followed by fixed-width little-endian sections:
+#
+#   sets     One SET record per prescription line, in plan/week/lift order.
+#   plans    One PLAN record per plan, pointing at its runs of sets and pairs.
+#   pairs    (name, value) records holding each plan's maxes, then its reductions.
+#   plates   Per-side plate weights, referenced by sets loaded with a PlateEngine.
+#   strings  Offsets, then the UTF-8 bytes, of every distinct string. Id 0 is None.
+#   index    An open-addressing hash table of (athlete hash, plan number + 1) slots.
+#
+# Records refer to strings by id, so numbers stay fixed-width while names, rep
+# targets like "5+" and notes are stored once however many plans use them. Numbers
+# are stored as doubles with a flag for each one that was an int, so a plan read
+# back renders "50 kg" where it was built with 50, not 50.0.
+MAGIC = b"TPLSTOR2"
+HEADER = struct.Struct("<8s9Q")
+SET = struct.Struct("<HIHIIIHIddIQHB")
+PLAN = struct.Struct("<IIIIQIQIQI")
+PAIR = struct.Struct("<IdB")
+PLATE = struct.Struct("<d")
+OFFSET = struct.Struct("<Q")
+SLOT = struct.Struct("<QI")
+
+_NONE_COUNT = 0xFFFFFFFF
+_NO_PLATES = 0xFFFF
+
+def _athlete_hash(athlete: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(athlete.encode(), digest_size=8).digest(), "little")
+
+def _number(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+# Flags of a SET record's numbers that were ints
+_INT_WEIGHT, _INT_PERCENT = 1, 2
+
+def _int_flag(value) -> int:
+    return isinstance(value, int)
+
+def _restore(value: float, was_int: int):
+    return int(value) if was_int else value
+
+class PlanStoreWriter:
+    """
+    Writes plans from any generator family to a plan store, one at a time.
+
+    Set records are streamed straight to disk, so memory grows only with the number of
+    distinct strings and athletes. The store is written to a temporary file and moved
+    into place by close(); use the writer as a context manager.
+
+    Args:
+        path (str): Where to write the store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(bytes(HEADER.size))
+        self._plans = tempfile.TemporaryFile()
+        self._pairs = tempfile.TemporaryFile()
+        self._plates = tempfile.TemporaryFile()
+
+        self._strings = {None: 0}
+        self._hashes = []
+        self._athletes = set()
+        self._set_count = 0
+        self._pair_count = 0
+        self._plate_count = 0
+
+    def _string(self, value: Optional[str]) -> int:
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings)
+        return string_id
+
+    def _write_pairs(self, pairs: Optional[dict]):
+        if pairs is None:
+            return self._pair_count, _NONE_COUNT
+        start = self._pair_count
+        self._pairs.write(b"".join(PAIR.pack(self._string(str(name)), _number(value), _int_flag(value))
+                                   for name, value in pairs.items()))
+        self._pair_count += len(pairs)
+        return start, len(pairs)
+
+    def _write_plates(self, plates: Optional[tuple]):
+        if plates is None:
+            return 0, _NO_PLATES
+        start = self._plate_count
+        self._plates.write(b"".join(PLATE.pack(p) for p in plates))
+        self._plate_count += len(plates)
+        return start, len(plates)
+
+    def add(self, plan: Plan, athlete: Optional[str] = None):
+        """
+        Append a plan to the store.
+
+        Args:
+            plan (Plan): A plan built by any generator's build_plan().
+            athlete (Optional[str]): The athlete id to index it under (default: plan.athlete).
+
+        Raises:
+            ValueError: If the plan has no athlete id or the id is already in the store.
+        """
+        athlete = athlete if athlete is not None else plan.athlete
+        if athlete is None:
+            raise ValueError("Plans need an athlete id to be stored.")
+        athlete = str(athlete)
+        if athlete in self._athletes:
+            raise ValueError(f"Duplicate athlete id in plan store: {athlete!r}")
+        self._athletes.add(athlete)
+        self._hashes.append(_athlete_hash(athlete))
+
+        records = []
+        for week in plan.weeks:
+            week_name = self._string(week.name)
+            for ordinal, lift in enumerate(week.lifts):
+                lift_name, day = self._string(lift.name), self._string(lift.day)
+                for s in lift.sets:
+                    plates_start, plates_count = self._write_plates(s.plates)
+                    records.append(SET.pack(week.number, week_name, ordinal, lift_name, day,
+                                            self._string(s.kind), s.sets, self._string(s.reps),
+                                            s.weight, _number(s.percent), self._string(s.note),
+                                            plates_start, plates_count,
+                                            _int_flag(s.weight) * _INT_WEIGHT | _int_flag(s.percent) * _INT_PERCENT))
+        self._file.write(b"".join(records))
+
+        maxes_start, maxes_count = self._write_pairs(plan.maxes)
+        reductions_start, reductions_count = self._write_pairs(plan.reductions)
+        self._plans.write(PLAN.pack(self._string(athlete), self._string(plan.family), self._string(plan.title),
+                                    self._string(plan.header_text), self._set_count, len(records),
+                                    maxes_start, maxes_count, reductions_start, reductions_count))
+        self._set_count += len(records)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _copy(self, section) -> int:
+        offset = self._file.tell()
+        section.seek(0)
+        shutil.copyfileobj(section, self._file)
+        section.close()
+        return offset
+
+    def close(self):
+        """
+        Write the remaining sections, the index and the header, and move the store into place.
+        """
+        if self._file.closed:
+            return
+        plans_offset = self._copy(self._plans)
+        pairs_offset = self._copy(self._pairs)
+        plates_offset = self._copy(self._plates)
+
+        strings_offset = self._file.tell()
+        encoded = [b""] + [s.encode() for s in list(self._strings)[1:]]
+        position = 0
+        for data in encoded:
+            self._file.write(OFFSET.pack(position))
+            position += len(data)
+        self._file.write(OFFSET.pack(position))
+        self._file.write(b"".join(encoded))
+
+        # Linear probing, at most half full
+        slot_count = 1
+        while slot_count < 2 * len(self._hashes):
+            slot_count *= 2
+        slots = [(0, 0)] * slot_count
+        for number, athlete_hash in enumerate(self._hashes):
+            slot = athlete_hash & (slot_count - 1)
+            while slots[slot][1]:
+                slot = (slot + 1) & (slot_count - 1)
+            slots[slot] = (athlete_hash, number + 1)
+        index_offset = self._file.tell()
+        self._file.write(b"".join(SLOT.pack(*s) for s in slots))
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, len(self._hashes), plans_offset, pairs_offset, plates_offset,
+                                     strings_offset, len(encoded), index_offset, slot_count, HEADER.size))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> "PlanStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for section in (self._file, self._plans, self._pairs, self._plates):
+                section.close()
+            os.remove(self._tmp_path)
+        return False
+
+class PlanStore:
+    """
+    Read-only, memory-mapped access to a plan store written by PlanStoreWriter.
+
+    Opening a store reads only its header. Looking up an athlete probes the on-disk
+    hash index and decodes just that athlete's records, so a lookup costs the same
+    however many plans the store holds.
+
+    Args:
+        path (str): Path to the store.
+
+    Raises:
+        ValueError: If the file is not a plan store.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._plan_count, self._plans, self._pairs, self._plates, self._strings,
+         self._string_count, self._index, self._slot_count, self._sets) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a plan store.")
+        self._blob = self._strings + OFFSET.size * (self._string_count + 1)
+
+        # Names, rep targets and notes repeat across every plan; decode each once
+        self._string = functools.lru_cache(maxsize=4096)(self._decode)
+
+    def _decode(self, string_id: int) -> Optional[str]:
+        if string_id == 0:
+            return None
+        start, = OFFSET.unpack_from(self._map, self._strings + OFFSET.size * string_id)
+        end, = OFFSET.unpack_from(self._map, self._strings + OFFSET.size * (string_id + 1))
+        return self._map[self._blob + start:self._blob + end].decode()
+
+    def _read_pairs(self, start: int, count: int) -> Optional[dict]:
+        if count == _NONE_COUNT:
+            return None
+        pairs = {}
+        for i in range(start, start + count):
+            name, value, was_int = PAIR.unpack_from(self._map, self._pairs + PAIR.size * i)
+            pairs[self._string(name)] = _optional(_restore(value, was_int))
+        return pairs
+
+    def _read_plan(self, number: int) -> Plan:
+        (athlete, family, title, header_text, sets_start, sets_count,
+         maxes_start, maxes_count, reductions_start, reductions_count) = \
+            PLAN.unpack_from(self._map, self._plans + PLAN.size * number)
+
+        weeks = []
+        week = lift = None
+        for i in range(sets_start, sets_start + sets_count):
+            (week_number, week_name, ordinal, lift_name, day, kind, set_count, reps,
+             weight, percent, note, plates_start, plates_count, ints) = \
+                SET.unpack_from(self._map, self._sets + SET.size * i)
+            if week is None or week.number != week_number:
+                week = Week(week_number, self._string(week_name), [])
+                weeks.append(week)
+                lift = None
+            if lift is None or ordinal != len(week.lifts) - 1:
+                lift = Lift(self._string(lift_name), [], day=self._string(day))
+                week.lifts.append(lift)
+            plates = None
+            if plates_count != _NO_PLATES:
+                plates = tuple(PLATE.unpack_from(self._map, self._plates + PLATE.size * (plates_start + j))[0]
+                               for j in range(plates_count))
+            lift.sets.append(Set(self._string(kind), set_count, self._string(reps),
+                                 _restore(weight, ints & _INT_WEIGHT), _optional(_restore(percent, ints & _INT_PERCENT)),
+                                 self._string(note), plates))
+
+        return Plan(self._string(family), self._string(title), self._read_pairs(maxes_start, maxes_count), weeks,
+                    header_text=self._string(header_text),
+                    reductions=self._read_pairs(reductions_start, reductions_count),
+                    athlete=self._string(athlete))
+
+    def _find(self, athlete: str) -> Optional[int]:
+        athlete_hash = _athlete_hash(athlete)
+        mask = self._slot_count - 1
+        slot = athlete_hash & mask
+        while True:
+            slot_hash, number = SLOT.unpack_from(self._map, self._index + SLOT.size * slot)
+            if not number:
+                return None
+            if slot_hash == athlete_hash:
+                stored, = struct.unpack_from("<I", self._map, self._plans + PLAN.size * (number - 1))
+                if self._string(stored) == athlete:
+                    return number - 1
+            slot = (slot + 1) & mask
+
+    def get(self, athlete: str) -> Optional[Plan]:
+        """
+        One athlete's plan, or None if the store has no plan for them.
+        """
+        number = self._find(str(athlete))
+        return self._read_plan(number) if number is not None else None
+
+    def __getitem__(self, athlete: str) -> Plan:
+        plan = self.get(athlete)
+        if plan is None:
+            raise KeyError(athlete)
+        return plan
+
+    def __contains__(self, athlete: str) -> bool:
+        return self._find(str(athlete)) is not None
+
+    def __len__(self) -> int:
+        return self._plan_count
+
+    def athletes(self) -> Iterator[str]:
+        """
+        Every athlete id, in the order the plans were written.
+        """
+        for number in range(self._plan_count):
+            stored, = struct.unpack_from("<I", self._map, self._plans + PLAN.size * number)
+            yield self._string(stored)
+
+    def plans(self) -> Iterator[Plan]:
+        """
+        Every plan, in the order they were written, decoded one at a time.
+        """
+        for number in range(self._plan_count):
+            yield self._read_plan(number)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "PlanStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
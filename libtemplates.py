@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from libplan import Week, Lift, Set
+
+# Declarative 5/3/1 templates. Every template runs the main work from the generator's
+# STRUCTURE_CORE; a template only describes the supplemental work added on top:
+#
+#   params:        Default parameter values, referenced as "$name" in supplemental entries.
+#   supplemental:  A list of entries, each prescribing one set line per lift per week:
+#       kind:         The set kind, also its label when rendered (e.g. "fsl" -> "FSL: ...").
+#       set:          Take percent and reps from this main set (0-based) of the week.
+#       percent:      Fraction of training max, instead of or overriding "set".
+#       sets / reps:  Sets and rep target (default: 1 set, the referenced set's reps).
+#       reps_suffix:  Appended to the reps, e.g. "+" for AMRAP.
+#       weeks:        Week numbers the entry applies to (default: every week).
+#
+# Any value may also be a mapping of week number -> value.
+TEMPLATES = {
+    "default": {},
+    "fsl": {
+        "params": {"sets": 5, "reps": 5},
+        "supplemental": [
+            {"kind": "fsl", "set": 0, "sets": "$sets", "reps": "$reps", "weeks": [1, 2, 3]},
+        ],
+    },
+    "widowmaker": {
+        "supplemental": [
+            {"kind": "widowmaker", "set": 0, "reps": "AMRAP", "weeks": [1, 2, 3]},
+        ],
+    },
+    "pyradmid": {
+        "supplemental": [
+            {"kind": "pyramid", "set": 1},
+            {"kind": "pyramid", "set": 0, "reps_suffix": "+"},
+        ],
+    },
+    "bbb": {
+        "params": {"sets": 5, "reps": 10, "percent": 0.5},
+        "supplemental": [
+            {"kind": "bbb", "sets": "$sets", "reps": "$reps", "percent": "$percent", "weeks": [1, 2, 3]},
+        ],
+    },
+    "joker": {
+        "supplemental": [
+            {"kind": "joker", "reps": {1: "5", 2: "3", 3: "1"}, "percent": {1: 0.90, 2: 0.95, 3: 1.00}, "weeks": [1, 2, 3]},
+            {"kind": "joker", "reps": {1: "5", 2: "3", 3: "1"}, "percent": {1: 0.95, 2: 1.00, 3: 1.05}, "weeks": [1, 2, 3]},
+        ],
+    },
+}
+
+CACHE_SIZE = 256
+
+# (template name, structure, params) -> CompiledTemplate, least recently used first
+_compiled = OrderedDict()
+
+class CompiledTemplate:
+    """
+    A template compiled against a week structure and parameters.
+
+    Attributes:
+        name (str): The template name.
+        weeks (tuple): Per week, (number, name, rows), where each row is a
+            (kind, sets, reps, percent) tuple: the main sets, then supplemental sets.
+        main_sets (int): How many rows of each week are main work.
+        build (Callable): build(maxes, round_weight, plates_for=None) -> List[Week], turning
+            training maxes into plan weeks with table lookups only.
+    """
+
+    __slots__ = ("name", "weeks", "main_sets", "build")
+
+    def __init__(self, name: str, weeks: tuple, main_sets: int, build: Callable):
+        self.name = name
+        self.weeks = weeks
+        self.main_sets = main_sets
+        self.build = build
+
+    def supplemental_percentages(self) -> List[List[Optional[float]]]:
+        """
+        The supplemental percentages per week, padded with None to equal length.
+        """
+        rows = [[row[3] for row in week_rows[self.main_sets:]] for _, _, week_rows in self.weeks]
+        width = max((len(r) for r in rows), default=0)
+        return [r + [None] * (width - len(r)) for r in rows]
+
+def _resolve(value, week: int, params: dict):
+    if isinstance(value, dict):
+        value = value[week] if week in value else value[str(week)]
+    if isinstance(value, str) and value.startswith("$"):
+        value = params[value[1:]]
+    return value
+
+def compile_template(spec: dict, structure: list, params: Optional[dict] = None, name: str = "") -> CompiledTemplate:
+    """
+    Compile a template spec into a percentage table and a build function.
+
+    Args:
+        spec (dict): The template spec (see TEMPLATES).
+        structure (list): The main work, in the form of WendlerBasic531Generator.STRUCTURE_CORE.
+        params (Optional[dict]): Values overriding the spec's default params.
+        name (str): The template name.
+
+    Returns:
+        CompiledTemplate: The compiled template.
+
+    Raises:
+        ValueError: If the spec refers to a missing parameter, set or week value.
+    """
+    params = {**spec.get("params", {}), **(params or {})}
+    main_sets = len(structure[0]["percentages"]) if structure else 0
+
+    weeks = []
+    for week in structure:
+        number = week["week"]
+        rows = [("working", 1, reps, percent) for percent, reps in zip(week["percentages"], week["reps"])]
+
+        for entry in spec.get("supplemental", []):
+            if number not in entry.get("weeks", [number]):
+                continue
+            try:
+                set_index = _resolve(entry.get("set"), number, params)
+                percent = _resolve(entry.get("percent"), number, params)
+                reps = _resolve(entry.get("reps"), number, params)
+                sets = _resolve(entry.get("sets", 1), number, params)
+            except (KeyError, TypeError) as e:
+                raise ValueError(f"Template {name!r} is missing a value for week {number}: {e}") from None
+            if set_index is not None:
+                percent = week["percentages"][set_index] if percent is None else percent
+                reps = week["reps"][set_index] if reps is None else reps
+            if percent is None or reps is None:
+                raise ValueError(f"Template {name!r} entry {entry['kind']!r} needs a percent and reps.")
+            rows.append((entry["kind"], sets, f"{reps}{entry.get('reps_suffix', '')}", percent))
+
+        weeks.append((number, week["name"], tuple(rows)))
+
+    weeks = tuple(weeks)
+
+    def build(maxes: dict, round_weight: Callable, plates_for: Optional[Callable] = None) -> List[Week]:
+        plan_weeks = []
+        for number, week_name, rows in weeks:
+            lifts = []
+            for lift, training_max in maxes.items():
+                sets = []
+                for kind, set_count, reps, percent in rows:
+                    weight = round_weight(training_max * percent)
+                    sets.append(Set(kind, set_count, reps, weight, percent,
+                                    plates=plates_for(weight) if plates_for else None))
+                lifts.append(Lift(lift.title(), sets))
+            plan_weeks.append(Week(number, week_name, lifts))
+        return plan_weeks
+
+    return CompiledTemplate(name, weeks, main_sets, build)
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def get_template(name: str, structure: list, params: Optional[dict] = None) -> CompiledTemplate:
+    """
+    The compiled form of a registered template, compiling it on first use.
+
+    Compiled templates are kept for the CACHE_SIZE most recently used (name,
+    structure, params) combinations, so per-request params cannot grow the cache
+    without bound.
+
+    Args:
+        name (str): The registered template name.
+        structure (list): The main work, in the form of WendlerBasic531Generator.STRUCTURE_CORE.
+        params (Optional[dict]): Values overriding the template's default params.
+
+    Returns:
+        CompiledTemplate: The compiled template, shared between callers.
+
+    Raises:
+        ValueError: If no template is registered under the name.
+    """
+    key = (name, _freeze(structure), _freeze(params or {}))
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        _compiled.move_to_end(key)
+        return compiled
+
+    if name not in TEMPLATES:
+        raise ValueError(f"Unknown template: {name!r}. Expected one of {list(TEMPLATES)}.")
+    compiled = _compiled[key] = compile_template(TEMPLATES[name], structure, params, name)
+    while len(_compiled) > CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return compiled
+
+def register_template(name: str, spec: dict):
+    """
+    Register a template spec, e.g. one loaded from YAML, under a name.
+
+    Args:
+        name (str): The template name, usable wherever a Template is accepted.
+        spec (dict): The template spec (see TEMPLATES).
+    """
+    TEMPLATES[name] = spec
+    _compiled.clear()
@@ -0,0 +1,404 @@
+#!/usr/bin/python3
+
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from libconfig import parse_documents
+from libplan import Plan
+from libplates import PlateEngine
+from libroster import generator_from_row
+
+# inotify(7) event masks
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# Files are reported once written and closed, or moved into place, as editors and
+# atomic writers do; IN_MODIFY would report half-written files.
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of NUL-padded name
+EVENT = struct.Struct("iIII")
+
+class _Inotify:
+    """
+    A non-blocking inotify instance watching a set of directories, through libc via ctypes.
+
+    Raises:
+        OSError: If inotify is not available.
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._ctypes = ctypes
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform.")
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._raise("inotify_init1")
+
+        # watch descriptor -> directory, and back
+        self._directories = {}
+        self._descriptors = {}
+
+    def _raise(self, call: str, path: Optional[str] = None):
+        errno = self._ctypes.get_errno()
+        raise OSError(errno, f"{call}: {os.strerror(errno)}", path)
+
+    def add(self, directory: str):
+        if directory in self._descriptors:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            self._raise("inotify_add_watch", directory)
+        self._directories[wd] = directory
+        self._descriptors[directory] = wd
+
+    def remove_tree(self, directory: str):
+        prefix = directory + os.sep
+        for path in [d for d in self._descriptors if d == directory or d.startswith(prefix)]:
+            wd = self._descriptors.pop(path)
+            self._directories.pop(wd, None)
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Tuple[Optional[str], int]]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            List[Tuple[Optional[str], int]]: (path, mask) per event; the path is None
+                when the kernel queue overflowed and events were lost.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0")
+                offset += EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    events.append((None, mask))
+                    continue
+                directory = self._directories.get(wd)
+                if mask & IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    if self._descriptors.get(directory) == wd:
+                        del self._descriptors[directory]
+                elif directory is not None and name:
+                    events.append((os.path.join(directory, os.fsdecode(name)), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class _Config:
+    """
+    What the watcher remembers of one config file: its stat signature, content digest
+    and parsed documents (None if it failed to parse or generate).
+    """
+
+    __slots__ = ("signature", "digest", "documents")
+
+    def __init__(self, signature: tuple, digest: bytes, documents: Optional[tuple]):
+        self.signature = signature
+        self.digest = digest
+        self.documents = documents
+
+class ConfigWatcher:
+    """
+    Watches a directory tree of YAML configs and regenerates the plans of those that change.
+
+    Each file holds one or more config documents, dispatched on their `generator:` key
+    like roster rows: HLMStandardGenerator, HLMAlternatePressingGenerator, or a Wendler
+    plan when there is none. The watcher keeps every file's stat signature, content
+    hash and parsed documents, so after the first scan a change costs one read, hash
+    and parse of the files that actually changed. Saving a file without changing it,
+    or touching it, regenerates nothing.
+
+    Changes are picked up with inotify where available and by walking the tree every
+    poll_interval seconds otherwise. Bursts of events are debounced: files are
+    processed once no new event has arrived for `debounce` seconds, or `max_delay`
+    seconds after the first, whichever comes first.
+
+    Args:
+        root (str): The directory to watch, recursively.
+        sink (Callable[[str, Optional[List[Plan]]], None]): Called with a config's path and
+            its regenerated plans, one per document, or None when the file was removed.
+        on_error (Optional[Callable[[str, str], None]]): Called with a config's path and why it
+            could not be regenerated (default: print to stderr). Its previous plans stand.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding.
+        suffixes (Tuple[str, ...]): File name endings of config files.
+        debounce (float): Seconds without events before pending changes are processed.
+        max_delay (float): Longest a change waits while events keep arriving.
+        poll_interval (float): Seconds between tree walks when polling.
+        use_inotify (bool): Use inotify if available; otherwise always poll.
+    """
+
+    def __init__(self, root: str,
+                 sink: Callable[[str, Optional[List[Plan]]], None],
+                 on_error: Optional[Callable[[str, str], None]] = None,
+                 plates: Optional[PlateEngine] = None,
+                 suffixes: Tuple[str, ...] = (".yaml", ".yml"),
+                 debounce: float = 0.1,
+                 max_delay: float = 1.0,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = True):
+        self.root = os.path.abspath(root)
+        self.sink = sink
+        self.on_error = on_error or (lambda path, message: print(f"{path}: {message}", file=sys.stderr))
+        self.plates = plates
+        self.suffixes = tuple(suffixes)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+
+        self._configs = {}
+        self._stopped = False
+        self._next_poll = 0.0
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                pass  # Not Linux, or no inotify in libc: poll instead
+
+    @property
+    def polling(self) -> bool:
+        """
+        Whether changes are found by walking the tree rather than through inotify.
+        """
+        return self._inotify is None
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def documents(self, path: str) -> Optional[tuple]:
+        """
+        The parsed documents of a watched config, or None if it is unknown or invalid.
+        """
+        config = self._configs.get(os.path.abspath(path))
+        return config.documents if config is not None else None
+
+    def _walk(self, top: str) -> Tuple[Dict[str, tuple], List[str]]:
+        # Config paths with their (mtime, size) signatures, and every directory, under top
+        files, directories = {}, []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue  # Removed while walking
+            directories.append(directory)
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(self.suffixes) and entry.is_file():
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        return files, directories
+
+    def _watch(self, directories: Iterable[str]):
+        if self._inotify is None:
+            return
+        try:
+            for directory in directories:
+                self._inotify.add(directory)
+        except OSError as e:
+            # Typically fs.inotify.max_user_watches exhausted by a large tree
+            print(f"inotify unavailable ({e}), polling {self.root} instead", file=sys.stderr)
+            self._inotify.close()
+            self._inotify = None
+
+    def _changed(self, top: str) -> Set[str]:
+        # Configs under top that are new, removed, or whose signature changed
+        files, directories = self._walk(top)
+        self._watch(directories)
+        prefix = top + os.sep
+        changed = {path for path, signature in files.items()
+                   if path not in self._configs or self._configs[path].signature != signature}
+        changed.update(path for path in self._configs
+                       if path.startswith(prefix) and path not in files)
+        return changed
+
+    def scan(self, notify: bool = True) -> List[str]:
+        """
+        Walk the whole tree and bring every config up to date.
+
+        Args:
+            notify (bool): Regenerate the changed configs' plans and pass them to the sink.
+                Without it configs are only parsed, e.g. to warm up without rewriting
+                outputs that are already current.
+
+        Returns:
+            List[str]: The configs that changed.
+        """
+        return self.refresh(self._changed(self.root), notify)
+
+    def refresh(self, paths: Iterable[str], notify: bool = True) -> List[str]:
+        """
+        Re-read some configs and regenerate those whose content changed.
+
+        Args:
+            paths (Iterable[str]): Config paths, e.g. from an external change feed.
+            notify (bool): Pass regenerated plans, and removals, to the sink.
+
+        Returns:
+            List[str]: The configs that changed or were removed, in path order.
+        """
+        changed = []
+        for path in sorted({os.path.abspath(path) for path in paths}):
+            if path.endswith(self.suffixes) and self._update(path, notify):
+                changed.append(path)
+        return changed
+
+    def _update(self, path: str, notify: bool) -> bool:
+        config = self._configs.get(path)
+        try:
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            if config is None:
+                return False
+            del self._configs[path]
+            if notify:
+                self.sink(path, None)
+            return True
+        except OSError as e:
+            self.on_error(path, str(e))
+            return False
+
+        # The content hash, not the signature, decides: an event or a walk only says
+        # the file may have changed, and mtimes can be coarse or reset.
+        signature = (stat.st_mtime_ns, stat.st_size)
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if config is not None and config.digest == digest:
+            config.signature = signature
+            return False
+
+        try:
+            documents = parse_documents(data)
+            plans = [generator_from_row(document, self.plates).build_plan() for document in documents] \
+                if notify else None
+        except (ValueError, TypeError, KeyError) as e:
+            self._configs[path] = _Config(signature, digest, None)
+            self.on_error(path, str(e))
+            return False
+
+        self._configs[path] = _Config(signature, digest, documents)
+        if notify:
+            self.sink(path, plans)
+        return True
+
+    def _wait(self, timeout: float) -> Set[str]:
+        # Paths that may have changed, gathered for up to timeout seconds
+        if self._inotify is None:
+            now = time.monotonic()
+            if now < self._next_poll:
+                time.sleep(min(timeout, self._next_poll - now))
+                if time.monotonic() < self._next_poll:
+                    return set()
+            self._next_poll = time.monotonic() + self.poll_interval
+            return self._changed(self.root)
+
+        paths = set()
+        for path, mask in self._inotify.read(timeout):
+            if path is None:
+                # Events were lost: fall back to comparing the whole tree
+                return self._changed(self.root)
+            if mask & IN_ISDIR:
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    self._inotify.remove_tree(path)
+                # Covers configs moved or created with the directory, and removed ones
+                paths |= self._changed(path)
+                if self._inotify is None:
+                    # Out of watches: polling from now on, so compare the whole tree for the rest of the batch
+                    return paths | self._changed(self.root)
+            elif path.endswith(self.suffixes):
+                paths.add(path)
+        return paths
+
+    def run(self, duration: Optional[float] = None, initial: bool = True):
+        """
+        Scan the tree, then watch it until stop() is called.
+
+        Args:
+            duration (Optional[float]): Stop after this many seconds (default: run until stopped).
+            initial (bool): Regenerate every config on the first scan, not only those
+                that changed since an earlier scan().
+        """
+        self._stopped = False
+        self.scan(notify=initial)
+        end = time.monotonic() + duration if duration is not None else None
+        self._next_poll = time.monotonic() + self.poll_interval
+
+        # Paths seen since the last refresh, when the first and latest arrived
+        pending, first, last = set(), 0.0, 0.0
+        while not self._stopped:
+            now = time.monotonic()
+            if end is not None and now >= end:
+                break
+            if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                self.refresh(pending)
+                pending = set()
+                continue
+
+            timeout = min(last + self.debounce, first + self.max_delay) - now if pending else self.poll_interval
+            if end is not None:
+                timeout = min(timeout, end - now)
+            paths = self._wait(max(timeout, 0.0))
+            if paths:
+                last = time.monotonic()
+                if not pending:
+                    first = last
+                pending |= paths
+
+        if pending:
+            self.refresh(pending)
+
+    def stop(self):
+        """
+        Make run() return, e.g. from a signal handler or another thread.
+        """
+        self._stopped = True
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "ConfigWatcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
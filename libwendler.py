@@ -1,12 +1,24 @@
 #!/usr/bin/python3
 
+import copy
+import math
+import sys
 from enum import Enum
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+from libplan import Plan, Week, Renderer, TextRenderer, exact_items
+from libplates import PlateEngine
+from libprofile import NULL_INSTRUMENTATION
+from libtemplates import TEMPLATES, CompiledTemplate, get_template
 
 class OneRMFormula(Enum):
     TRAININGMAX = "trainingmax"
     EPLEY = "epley"
     BRZYCKI = "bryzcki"
+    LOMBARDI = "lombardi"
+    WATHAN = "wathan"
+    MAYHEW = "mayhew"
+    OCONNER = "oconner"
 
 class Template(Enum):
     DEFAULT = "default"
@@ -18,6 +30,26 @@ class MaxType(Enum):
     TRAINING_MAX = "training_max"
     ONERM = "onerm"
 
+def _template_name(template) -> str:
+    """
+    The registered template name for a Template member or a template name.
+    """
+    return template.value if isinstance(template, Template) else template
+
+_TEMPLATE_VALUES = {t.value for t in Template}
+
+def _as_template(template):
+    """
+    The Template member for a built-in template's name, so "fsl" and Template.FSL are
+    handled alike; other registered template names are returned unchanged.
+    """
+    if isinstance(template, str) and template in _TEMPLATE_VALUES:
+        return Template(template)
+    return template
+
+# Default training max increase per cycle: +5 kg lower body, +2.5 kg upper body
+DEFAULT_TM_INCREMENTS = {'squat': 5.0, 'deadlift': 5.0, 'bench': 2.5, 'press': 2.5}
+
 class WendlerBasic531Generator:
 
     # Define default percentages for templates
@@ -43,7 +75,10 @@ class WendlerBasic531Generator:
                  tm_percentage: float = 90.0,
                  header_text:Optional[str] = None,
                  templates: List[Template] = None,
-                 fsl_params: Optional[dict] = None):
+                 fsl_params: Optional[dict] = None,
+                 plates: Optional[PlateEngine] = None,
+                 template_params: Optional[dict] = None,
+                 instrument=None):
         """
         Initialize the Wendler 5/3/1 generator.
 
@@ -55,13 +90,21 @@ class WendlerBasic531Generator:
             active_lifts (Optional[List[str]]): List of active lifts to include (default: all lifts).
             max_type (MaxType): Type of max calculation (Training Max or One Rep Max).
             tm_percentage (float): Percentage of 1RM to use as training max.
-            templates (List[Template]): List of templates to include in the program.
+            templates (List[Template]): List of templates to include in the program. Names of
+                templates registered in libtemplates are accepted too.
             fsl_params (Optional[dict]): Additional parameters for FSL template.
+            plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding to 2.5 kg.
+            template_params (Optional[dict]): Parameters for the selected template, e.g. BBB sets and percent.
+            instrument (Optional[Instrumentation]): Collect phase timings into this libprofile.Instrumentation.
         """
 
+        self.instrument = instrument if instrument is not None else NULL_INSTRUMENTATION
+
         self.header_text = header_text
 
-        self.templates = templates if templates else []
+        self.plates = plates
+
+        self.templates = [_as_template(t) for t in templates] if templates else []
 
         self.active_lifts = active_lifts or ['squat', 'bench', 'deadlift', 'press']
 
@@ -69,9 +112,10 @@ class WendlerBasic531Generator:
         self.tm_percentage = tm_percentage
         # Filter maxes to include only active lifts
         all_maxes = {'squat': squat, 'bench': bench, 'deadlift': deadlift, 'press': press}
-        self.maxes = self._calculate_training_maxes(
-            {lift: all_maxes[lift] for lift in self.active_lifts}
-        )
+        with self.instrument.phase("training_maxes"):
+            self.maxes = self._calculate_training_maxes(
+                {lift: all_maxes[lift] for lift in self.active_lifts}
+            )
 
         # Validate the template combinations:
         self._validate_templates()
@@ -80,6 +124,39 @@ class WendlerBasic531Generator:
         if Template.FSL in self.templates:
             self.fsl_params = self._process_fsl_params(fsl_params)
 
+        # Compiled once per distinct template configuration and shared between generators:
+        with self.instrument.phase("template_compile"):
+            self.template = self._compile_template(template_params)
+
+    @classmethod
+    def from_index(cls, index, athlete: str, rolling: bool = False, **kwargs) -> "WendlerBasic531Generator":
+        """
+        Create a generator whose maxes come from an E1RMIndex.
+
+        The index holds estimated 1RMs, so max_type defaults to MaxType.ONERM, and
+        active_lifts defaults to the main lifts the athlete has logged.
+
+        Args:
+            index (E1RMIndex): The index to read maxes from.
+            athlete (str): The athlete id.
+            rolling (bool): Use rolling-window bests instead of all-time bests.
+            **kwargs: Any other WendlerBasic531Generator arguments.
+
+        Returns:
+            WendlerBasic531Generator: The configured generator.
+
+        Raises:
+            KeyError: If the athlete has no logged sets.
+            ValueError: If the athlete has logged none of the main lifts.
+        """
+        maxes = {lift: value for lift, value in index.maxes(athlete, rolling=rolling).items()
+                 if lift in ('squat', 'bench', 'deadlift', 'press')}
+        if not maxes:
+            raise ValueError(f"Athlete {athlete!r} has no estimated maxes for the main lifts.")
+        kwargs.setdefault('max_type', MaxType.ONERM)
+        kwargs.setdefault('active_lifts', list(maxes))
+        return cls(**maxes, **kwargs)
+
     def _calculate_training_maxes(self, maxes: dict) -> dict:
         """
         Calculate training maxes based on the provided max_type and training max percentage.
@@ -113,17 +190,36 @@ class WendlerBasic531Generator:
     def _validate_templates(self):
         """
         Validate the template combinations to ensure mutual exclusivity.
-        Only one of FSL, Pyramid, or Widowmaker can be selected, or none.
+        Only one template with supplemental work (FSL, Pyramid, Widowmaker, ...) can be selected, or none.
 
         Raises:
-            ValueError: If mutually exclusive templates are selected simultaneously.
+            ValueError: If a template is unknown, or mutually exclusive templates are selected simultaneously.
         """
-        mutually_exclusive_templates = {Template.FSL, Template.WIDOWMAKER, Template.PYRAMID}
-        selected_exclusive_templates = [t for t in self.templates if t in mutually_exclusive_templates]
-        
+        unknown_templates = [t for t in self.templates if _template_name(t) not in TEMPLATES]
+        if unknown_templates:
+            raise ValueError(f"Unknown templates {unknown_templates}. Expected one of {list(TEMPLATES)}.")
+
+        selected_exclusive_templates = [t for t in self.templates if TEMPLATES[_template_name(t)].get("supplemental")]
+
         if len(selected_exclusive_templates) > 1:
-            template_names = [t.value for t in selected_exclusive_templates]
-            raise ValueError(f"Templates {template_names} are mutually exclusive. Only one of FSL, Pyramid, or Widowmaker can be selected, or none.")
+            template_names = [_template_name(t) for t in selected_exclusive_templates]
+            raise ValueError(f"Templates {template_names} are mutually exclusive. Only one supplemental template (FSL, Pyramid, Widowmaker, ...) can be selected, or none.")
+
+    def _compile_template(self, template_params: Optional[dict]) -> CompiledTemplate:
+        """
+        Look up the compiled form of the selected supplemental template (or the main work alone).
+
+        Args:
+            template_params (Optional[dict]): Parameters overriding the template's defaults.
+
+        Returns:
+            CompiledTemplate: The compiled template.
+        """
+        selected = [t for t in self.templates if TEMPLATES[_template_name(t)].get("supplemental")]
+        params = dict(template_params or {})
+        if Template.FSL in self.templates:
+            params.update(self.fsl_params)
+        return get_template(_template_name(selected[0]) if selected else "default", self.STRUCTURE_CORE, params)
 
     def _process_fsl_params(self, fsl_params: Optional[dict]) -> Optional[dict]:
         """
@@ -156,7 +252,8 @@ class WendlerBasic531Generator:
 
     def _round_weight(self, weight: float) -> float:
         """
-        Round the weight to the nearest specified value.
+        Round the weight to the nearest specified value, or the nearest loadable weight
+        when a plate engine is in use.
 
         Args:
             weight (float): The weight to round.
@@ -164,67 +261,414 @@ class WendlerBasic531Generator:
         Returns:
             float: Rounded weight.
         """
+        if self.plates is not None:
+            return self.plates.snap(weight)
+
         round_value = 2.5
         return round(weight / round_value) * round_value
 
-    def generate(self):
+    def cache_key(self) -> tuple:
         """
-        Print the program info and generate the 5/3/1 program.
+        A hashable key identifying the plan this generator builds.
+
+        Keys capture the exact training maxes, templates and header the plan is
+        built and rendered from, so generators with equal keys build identical plans.
         """
-        print(f"Wendler 5/3/1: {''.join([template.value for template in self.templates])}")
+        return (
+            type(self).__name__,
+            exact_items(self.maxes),
+            tuple(_template_name(template) for template in self.templates),
+            self.template.weeks,
+            self.header_text,
+            self.plates.cache_key() if self.plates is not None else None,
+        )
 
-        print(self.header_text) if self.header_text else None
+    def build_plan(self) -> Plan:
+        """
+        Compute the 5/3/1 program without rendering it.
 
-        print("\nTraining Maxes:")
-        for lift, tm in self.maxes.items():
-            print(f"  {lift.title()}: {tm:.2f} kgs")
+        Returns:
+            Plan: The structured plan.
+        """
+        with self.instrument.phase("build"):
+            return self.plan_from_weeks(self._generate_plan_core())
 
-        self._generate_plan_core()
+    def plan_from_weeks(self, weeks: List[Week]) -> Plan:
+        """
+        Wrap already-built weeks in this generator's plan title, maxes and header.
+        """
+        return Plan(
+            family="wendler",
+            title=f"Wendler 5/3/1: {''.join([_template_name(template) for template in self.templates])}",
+            maxes=dict(self.maxes),
+            weeks=weeks,
+            header_text=self.header_text,
+        )
 
-    def _generate_plan_core(self):
+    def segment_dependencies(self) -> dict:
         """
-        Generate the core 5/3/1 program and print the results.
+        The plan's segments and the inputs each depends on: one segment per lift,
+        covering every week, depending only on that lift's max.
         """
-        for week in self.STRUCTURE_CORE:
+        return {lift: frozenset([lift]) for lift in self.maxes}
 
-            print(f"\n{week['name']}:")
+    def build_segment(self, key: str) -> list:
+        """
+        Build one lift's segment.
 
-            for lift, training_max in self.maxes.items():
+        Returns:
+            list: (week number, week name, position in week, Lift) for every week.
+        """
+        plates_for = self.plates.plates_for if self.plates is not None else None
+        weeks = self.template.build({key: self.maxes[key]}, self._round_weight, plates_for)
+        position = list(self.maxes).index(key)
+        return [(week.number, week.name, position, week.lifts[0]) for week in weeks]
 
-                print(f"  {lift.title()}:")
+    def set_inputs(self, **maxes) -> set:
+        """
+        Change some lift maxes, given in this generator's max_type.
 
-                for i, (percent, reps) in enumerate(zip(week['percentages'], week['reps'])):
-                    weight = self._round_weight(training_max * percent)
-                    print(f"    Set {i+1}: {reps} reps @ {self._round_weight(weight):.1f} kg ({percent*100:.0f}%)")
+        Returns:
+            set: The lifts whose training max changed.
+
+        Raises:
+            ValueError: If a lift is not active in this generator.
+        """
+        unknown = [lift for lift in maxes if lift not in self.maxes]
+        if unknown:
+            raise ValueError(f"Lifts {unknown} are not active. Expected some of {list(self.maxes)}.")
+        with self.instrument.phase("training_maxes"):
+            training_maxes = self._calculate_training_maxes(maxes)
+        changed = {lift for lift, tm in training_maxes.items() if tm != self.maxes[lift]}
+        self.maxes.update(training_maxes)
+        return changed
+
+    def generate(self, out=None, renderer: Optional[Renderer] = None) -> Plan:
+        """
+        Generate the 5/3/1 program and render it.
 
-                if Template.FSL in self.templates:
-                    if week["week"] != 4:
-                        print(f"    FSL: {self.fsl_params['sets']} x {self.fsl_params['reps']} @ {self._round_weight(training_max * week['percentages'][0]):.1f} kg")
-                elif Template.WIDOWMAKER in self.templates:
-                    if week["week"] != 4:
-                        print(f"    WIDOWMAKER: AMRAP @ {self._round_weight(training_max * week['percentages'][0]):.1f} kg")
-                elif Template.PYRAMID in self.templates:
-                    print(f"    PYRAMID: {week['reps'][1]} reps @ {self._round_weight(training_max * week['percentages'][1]):.1f} kg")
-                    print(f"    PYRAMID: {week['reps'][0]}+ reps @ {self._round_weight(training_max * week['percentages'][0]):.1f} kg")
+        Args:
+            out: File-like object to write to (default: sys.stdout).
+            renderer (Optional[Renderer]): How to render the plan (default: TextRenderer).
 
-def estimate_1rm(weight: float, reps: int, method: OneRMFormula = "BRZYCKI") -> float:
+        Returns:
+            Plan: The structured plan that was rendered.
+        """
+        plan = self.build_plan()
+        renderer = renderer or TextRenderer()
+        with self.instrument.phase("render"):
+            output = renderer.preamble() + renderer.format(plan)
+        with self.instrument.phase("write"):
+            (out if out is not None else sys.stdout).write(output)
+        return plan
+
+    def cycles(self,
+               increments: Optional[dict] = None,
+               deload_every: Optional[int] = None,
+               reset_every: Optional[int] = None,
+               reset_percentage: float = 90.0) -> Iterator["Cycle"]:
+        """
+        Lazily yield successive 5/3/1 cycles, starting with this generator's training maxes.
+
+        Each cycle's training maxes are derived from the previous cycle's, so only the
+        maxes are carried forward; plans are built on demand from the yielded Cycle.
+        When both rules fall on the same cycle, the reset wins.
+
+        Args:
+            increments (Optional[dict]): Training max increase per lift per cycle
+                (default: DEFAULT_TM_INCREMENTS).
+            deload_every (Optional[int]): Hold training maxes after every N cycles instead of increasing them.
+            reset_every (Optional[int]): Reset training maxes after every N cycles.
+            reset_percentage (float): Percentage of the current training max to reset to.
+
+        Yields:
+            Cycle: Cycle 1, 2, 3, ... without end; use itertools.islice to bound it.
+        """
+        increments = DEFAULT_TM_INCREMENTS if increments is None else increments
+        training_maxes = dict(self.maxes)
+        number, kind = 1, "start"
+
+        while True:
+            yield Cycle(number, kind, dict(training_maxes), self)
+
+            number += 1
+            if reset_every and (number - 1) % reset_every == 0:
+                kind = "reset"
+                training_maxes = {lift: tm * (reset_percentage / 100) for lift, tm in training_maxes.items()}
+            elif deload_every and (number - 1) % deload_every == 0:
+                kind = "deload"
+            else:
+                kind = "progress"
+                training_maxes = {lift: tm + increments.get(lift, 0.0) for lift, tm in training_maxes.items()}
+
+    def _generate_plan_core(self) -> List[Week]:
+        """
+        Generate the core 5/3/1 program from the compiled template.
+
+        Returns:
+            List[Week]: One entry per week of STRUCTURE_CORE.
+        """
+        plates_for = self.plates.plates_for if self.plates is not None else None
+        return self.template.build(self.maxes, self.instrument.wrap("rounding", self._round_weight), plates_for)
+
+class Cycle:
+    """
+    One cycle of a multi-cycle progression, as yielded by WendlerBasic531Generator.cycles().
+
+    Attributes:
+        number (int): The cycle number, starting at 1.
+        kind (str): How the training maxes were derived: "start", "progress", "deload" or "reset".
+        training_maxes (dict): The training maxes for this cycle.
+    """
+
+    __slots__ = ("number", "kind", "training_maxes", "_base")
+
+    def __init__(self, number: int, kind: str, training_maxes: dict, base: WendlerBasic531Generator):
+        self.number = number
+        self.kind = kind
+        self.training_maxes = training_maxes
+        self._base = base
+
+    def generator(self) -> WendlerBasic531Generator:
+        """
+        A generator for this cycle, sharing the original's templates and parameters.
+        """
+        generator = copy.copy(self._base)
+        generator.maxes = dict(self.training_maxes)
+        return generator
+
+    def build_plan(self) -> Plan:
+        """
+        Compute this cycle's plan.
+        """
+        return self.generator().build_plan()
+
+class WendlerBatchResult:
+    """
+    Array-backed 5/3/1 plans for a whole roster, as returned by generate_batch().
+
+    Attributes:
+        lifts (List[str]): Lift names, in column order.
+        weeks (List[str]): Week names from STRUCTURE_CORE, in order.
+        reps (List[List[str]]): Rep targets per week and set.
+        percentages (numpy.ndarray): (weeks, sets) percentages of training max.
+        training_maxes (numpy.ndarray): (athletes, lifts) training maxes.
+        working (numpy.ndarray): (athletes, weeks, lifts, sets) rounded working-set weights.
+        supplemental (Optional[numpy.ndarray]): (athletes, weeks, lifts, slots) rounded
+            supplemental weights, NaN where a week has no supplemental set.
+        supplemental_template (Optional[Template]): The template supplemental slots belong to
+            (its name, for templates registered in libtemplates only).
+        supplemental_rows (List[list]): Per week, the (kind, sets, reps, percent) of each supplemental slot.
+        fsl_params (Optional[dict]): Validated FSL parameters, when FSL is selected.
+        plates (Optional[PlateEngine]): The plate engine weights were snapped with, for
+            looking up per-side plates with plates.plates_for().
+    """
+
+    __slots__ = ("lifts", "weeks", "reps", "percentages", "training_maxes",
+                 "working", "supplemental", "supplemental_template", "supplemental_rows",
+                 "fsl_params", "plates")
+
+    def __init__(self, lifts, weeks, reps, percentages, training_maxes,
+                 working, supplemental, supplemental_template, supplemental_rows,
+                 fsl_params, plates=None):
+        self.lifts = lifts
+        self.weeks = weeks
+        self.reps = reps
+        self.percentages = percentages
+        self.training_maxes = training_maxes
+        self.working = working
+        self.supplemental = supplemental
+        self.supplemental_template = supplemental_template
+        self.supplemental_rows = supplemental_rows
+        self.fsl_params = fsl_params
+        self.plates = plates
+
+    def __len__(self) -> int:
+        return self.training_maxes.shape[0]
+
+def generate_batch(maxes,
+                   active_lifts: Optional[List[str]] = None,
+                   max_type: MaxType = MaxType.TRAINING_MAX,
+                   tm_percentage: float = 90.0,
+                   templates: List[Template] = None,
+                   fsl_params: Optional[dict] = None,
+                   plates: Optional[PlateEngine] = None,
+                   template_params: Optional[dict] = None) -> WendlerBatchResult:
+    """
+    Compute 5/3/1 working and supplemental weights for many athletes at once.
+
+    Every athlete shares the same templates and parameters; only the maxes differ.
+    Weights are rounded (or snapped to plates) exactly like WendlerBasic531Generator._round_weight.
+
+    Args:
+        maxes (array-like): (athletes, lifts) maxes, columns ordered as active_lifts.
+        active_lifts (Optional[List[str]]): Lifts the columns correspond to (default: all lifts).
+        max_type (MaxType): Type of max calculation (Training Max or One Rep Max).
+        tm_percentage (float): Percentage of 1RM to use as training max.
+        templates (List[Template]): List of templates to include in the program.
+        fsl_params (Optional[dict]): Additional parameters for FSL template.
+        plates (Optional[PlateEngine]): Snap weights to loadable plates instead of rounding to 2.5 kg.
+        template_params (Optional[dict]): Parameters for the selected template.
+
+    Returns:
+        WendlerBatchResult: Array-backed plans for every athlete.
+
+    Raises:
+        ValueError: If the templates, FSL parameters or maxes shape are invalid.
+    """
+    import numpy as np
+
+    # Validate the shared parameters once through the regular generator.
+    proto = WendlerBasic531Generator(active_lifts=active_lifts, max_type=max_type,
+                                     tm_percentage=tm_percentage, templates=templates,
+                                     fsl_params=fsl_params, template_params=template_params)
+    lifts = list(proto.active_lifts)
+
+    maxes = np.asarray(maxes, dtype=np.float64)
+    if maxes.ndim == 1:
+        maxes = maxes.reshape(-1, len(lifts))
+    if maxes.ndim != 2 or maxes.shape[1] != len(lifts):
+        raise ValueError(f"maxes must have shape (athletes, {len(lifts)}), got {maxes.shape}.")
+
+    if proto.max_type == MaxType.TRAINING_MAX:
+        training_maxes = maxes
+    else:
+        training_maxes = maxes * ((proto.tm_percentage or proto._get_template_percentage()) / 100)
+
+    structure = proto.STRUCTURE_CORE
+    percentages = np.array([week["percentages"] for week in structure], dtype=np.float64)
+
+    def prescribe(table):
+        # (athletes, 1, lifts, 1) * (1, weeks, 1, sets) -> (athletes, weeks, lifts, sets)
+        weights = training_maxes[:, None, :, None] * table[None, :, None, :]
+        if plates is not None:
+            return plates.snap_array(weights)
+        round_value = 2.5
+        return np.round(weights / round_value) * round_value
+
+    working = prescribe(percentages)
+
+    # Supplemental percentages come from the compiled template, NaN where a week has no set.
+    supplemental = None
+    supplemental_template = None
+    supplemental_rows = [list(rows[proto.template.main_sets:]) for _, _, rows in proto.template.weeks]
+    supplemental_percentages = np.array(proto.template.supplemental_percentages(), dtype=np.float64)
+    if supplemental_percentages.size:
+        name = proto.template.name
+        supplemental_template = Template(name) if name in {t.value for t in Template} else name
+        supplemental = prescribe(supplemental_percentages)
+
+    return WendlerBatchResult(
+        lifts=lifts,
+        weeks=[week["name"] for week in structure],
+        reps=[list(week["reps"]) for week in structure],
+        percentages=percentages,
+        training_maxes=training_maxes,
+        working=working,
+        supplemental=supplemental,
+        supplemental_template=supplemental_template,
+        supplemental_rows=supplemental_rows,
+        fsl_params=getattr(proto, "fsl_params", None),
+        plates=plates,
+    )
+
+def _formula(method) -> OneRMFormula:
+    """
+    Accept a OneRMFormula or its value/name as a string.
+    """
+    if isinstance(method, OneRMFormula):
+        return method
+    try:
+        return OneRMFormula(method)
+    except ValueError:
+        try:
+            return OneRMFormula[str(method).upper()]
+        except KeyError:
+            raise ValueError(f"Unsupported method: {method}") from None
+
+def estimate_1rm(weight: float, reps: int, method: OneRMFormula = OneRMFormula.BRZYCKI) -> float:
     """
     Estimate a 1RM (One-Rep Max) based on weight and reps using the specified formula.
 
     Args:
         weight (float): The weight lifted.
         reps (int): The number of reps completed.
-        method (str): The formula to use for estimation ('epley', 'brzycki', etc.).
+        method (OneRMFormula): The formula to use for estimation (a member, or its value or name).
 
     Returns:
         float: The estimated 1RM.
+
+    Raises:
+        ValueError: If the method is unknown, or reps are out of the formula's range.
     """
-    if reps == 1:
+    method = _formula(method)
+
+    if reps == 1 or method == OneRMFormula.TRAININGMAX:
         return weight  # If it's a true 1RM, return as is
 
+    if reps < 1:
+        raise ValueError(f"Reps must be at least 1, got {reps}.")
+
     if method == OneRMFormula.EPLEY:
         return weight * (1 + reps / 30)
     elif method == OneRMFormula.BRZYCKI:
+        if reps >= 37:
+            raise ValueError("Brzycki is undefined for 37 or more reps.")
         return weight * (36 / (37 - reps))
+    elif method == OneRMFormula.LOMBARDI:
+        return weight * reps ** 0.10
+    elif method == OneRMFormula.WATHAN:
+        return 100 * weight / (48.8 + 53.8 * math.exp(-0.075 * reps))
+    elif method == OneRMFormula.MAYHEW:
+        return 100 * weight / (52.2 + 41.9 * math.exp(-0.055 * reps))
+    elif method == OneRMFormula.OCONNER:
+        return weight * (1 + reps / 40)
     else:
         raise ValueError(f"Unsupported method: {method}")
+
+def estimate_1rm_batch(weights, reps, method: OneRMFormula = OneRMFormula.BRZYCKI):
+    """
+    Estimate 1RMs for arrays of (weight, reps) pairs in one vectorized pass.
+
+    Pairs the formula cannot handle (reps below 1, Brzycki with 37 or more reps,
+    negative or non-finite weights) come back as NaN rather than raising.
+
+    Args:
+        weights (array-like): The weights lifted.
+        reps (array-like): The reps completed, broadcastable against weights.
+        method (OneRMFormula): The formula to use for estimation (a member, or its value or name).
+
+    Returns:
+        numpy.ndarray: The estimated 1RMs, with the broadcast shape of weights and reps.
+    """
+    import numpy as np
+
+    method = _formula(method)
+    weights, reps = np.broadcast_arrays(np.asarray(weights, dtype=np.float64),
+                                        np.asarray(reps, dtype=np.float64))
+
+    invalid = ~np.isfinite(weights) | ~np.isfinite(reps) | (weights < 0) | (reps < 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if method == OneRMFormula.TRAININGMAX:
+            estimates = weights.copy()
+        elif method == OneRMFormula.EPLEY:
+            estimates = weights * (1 + reps / 30)
+        elif method == OneRMFormula.BRZYCKI:
+            invalid |= reps >= 37
+            estimates = weights * (36 / (37 - reps))
+        elif method == OneRMFormula.LOMBARDI:
+            estimates = weights * reps ** 0.10
+        elif method == OneRMFormula.WATHAN:
+            estimates = 100 * weights / (48.8 + 53.8 * np.exp(-0.075 * reps))
+        elif method == OneRMFormula.MAYHEW:
+            estimates = 100 * weights / (52.2 + 41.9 * np.exp(-0.055 * reps))
+        elif method == OneRMFormula.OCONNER:
+            estimates = weights * (1 + reps / 40)
+        else:
+            raise ValueError(f"Unsupported method: {method}")
+
+    # A true single is its own 1RM, whatever the formula says
+    estimates = np.where(reps == 1, weights, estimates)
+    estimates[invalid] = np.nan
+    return estimates
@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Everything below is imported inside the command that needs it: this script runs
+# from cron and shell loops, where interpreter and import startup dominate.
+
+def _renderer(name: str):
+    from libplan import TextRenderer, JSONRenderer, CSVRenderer
+    return {"text": TextRenderer, "json": JSONRenderer, "csv": CSVRenderer}[name]()
+
+def _plates(args):
+    if args.bar is None and args.plates is None:
+        return None
+    from libplates import PlateEngine
+    inventory = None
+    if args.plates is not None:
+        # "<plate>:<total count>,..." e.g. "25:8,20:4,10:4,5:4,2.5:4,1.25:4"
+        inventory = {float(plate): int(count) for plate, count in
+                     (entry.split(":") for entry in args.plates.split(","))}
+    return PlateEngine(args.bar if args.bar is not None else 20.0, inventory)
+
+def _instrument(args):
+    from libprofile import Instrumentation, NULL_INSTRUMENTATION
+    return Instrumentation(memory=args.profile_memory) if args.profile else NULL_INSTRUMENTATION
+
+def _write(generators, renderer, out, instrument):
+    out.write(renderer.preamble())
+    for generator in generators:
+        plan = generator.build_plan()
+        with instrument.phase("render"):
+            output = renderer.format(plan)
+        with instrument.phase("write"):
+            out.write(output)
+
+def wendler(args):
+    from libroster import wendler_from_row
+
+    row = {}
+    if args.config:
+        from libconfig import load_config
+        row.update(load_config(args.config))
+    for field in ("squat", "bench", "deadlift", "press", "active_lifts", "fsl_params",
+                  "max_type", "tm_percentage", "header_text"):
+        if getattr(args, field) is not None:
+            row[field] = getattr(args, field)
+    if args.templates:
+        row["templates"] = args.templates
+
+    instrument = _instrument(args)
+    _write([wendler_from_row(row, _plates(args), instrument)], _renderer(args.format), sys.stdout, instrument)
+    return instrument
+
+def hlm(args):
+    from libhlm import generators_from_file
+
+    instrument = _instrument(args)
+    generators = [generator for config in args.configs
+                  for generator in generators_from_file(config, _plates(args), instrument)]
+    _write(generators, _renderer(args.format), sys.stdout, instrument)
+    return instrument
+
+def roster(args):
+    from libcache import PlanCache
+    from libroster import read_roster, run_roster
+
+    if args.shard_count > 1:
+        from libparallel import shard_roster
+        rows = shard_roster(args.roster, args.shard_index, args.shard_count)
+    else:
+        rows = read_roster(args.roster)
+
+    cache = PlanCache(args.cache_size) if args.cache_size else None
+    if args.store:
+        from libroster import build_roster
+        from libstore import PlanStoreWriter
+
+        with PlanStoreWriter(args.store) as writer:
+            for athlete, plan in build_roster(rows, plates=_plates(args), cache=cache):
+                writer.add(plan, athlete)
+        print(f"{len(writer)} plans stored in {args.store}", file=sys.stderr)
+        return None
+
+    if args.db:
+        from libdb import PlanDatabase
+
+        with PlanDatabase(args.db) as db:
+            stats = db.store_roster(rows, plates=_plates(args), cache=cache)
+        print(f"{stats.plans} plans stored in {args.db}, {stats.errors} rejected rows", file=sys.stderr)
+        return None
+
+    # Only the first shard writes the preamble, so shard outputs concatenate into one file
+    preamble = args.shard_index == 0
+    if args.workers > 1:
+        from libparallel import run_parallel
+        stats = run_parallel(rows, sys.stdout, _renderer(args.format), args.workers, args.chunk_size,
+                             plates=_plates(args), cache_size=args.cache_size, preamble=preamble)
+    else:
+        stats = run_roster(rows, sys.stdout, _renderer(args.format),
+                           plates=_plates(args), cache=cache, preamble=preamble)
+    print(f"{stats.plans} plans, {stats.errors} rejected rows", file=sys.stderr)
+    return None
+
+def fetch(args):
+    from libstore import PlanStore
+
+    with PlanStore(args.store) as store:
+        renderer = _renderer(args.format)
+        sys.stdout.write(renderer.preamble())
+        for athlete in args.athletes:
+            plan = store.get(athlete)
+            if plan is None:
+                raise KeyError(f"no plan for athlete {athlete!r}")
+            sys.stdout.write(renderer.format(plan))
+    return None
+
+def serve(args):
+    from libservice import serve as run_service
+
+    run_service(args.host, args.port, args.cache_size, _plates(args))
+    return None
+
+def watch(args):
+    from libwatch import ConfigWatcher
+
+    renderer = _renderer(args.format)
+    root = os.path.abspath(args.root)
+
+    def sink(path, plans):
+        output = renderer.preamble() + "".join(renderer.format(plan) for plan in plans or ())
+        if args.output is None:
+            if plans:
+                sys.stdout.write(output)
+                sys.stdout.flush()
+            return
+        # <output>/<config path relative to the root>.<format>, replaced atomically
+        target = os.path.join(args.output, os.path.relpath(path, root)) + "." + args.format
+        if plans is None:
+            if os.path.exists(target):
+                os.remove(target)
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + ".tmp", "w") as f:
+            f.write(output)
+        os.replace(target + ".tmp", target)
+
+    with ConfigWatcher(root, sink, plates=_plates(args), debounce=args.debounce,
+                       poll_interval=args.poll_interval, use_inotify=not args.poll) as watcher:
+        if watcher.polling:
+            print(f"Polling {root} every {args.poll_interval:g} s", file=sys.stderr)
+        try:
+            watcher.run(initial=not args.skip_initial)
+        except KeyboardInterrupt:
+            pass
+    return None
+
+def autoregulate(args):
+    import json
+    from libautoreg import autoregulate as adjust
+    from libroster import read_roster
+
+    result = adjust(read_roster(args.roster), read_roster(args.results),
+                    min_extra_reps=args.min_extra_reps, reset_percentage=args.reset_percentage)
+    for row in result.next_rows():
+        sys.stdout.write(json.dumps(row, default=str) + "\n")
+    for lift, counts in result.counts().items():
+        print(f"{lift}: " + ", ".join(f"{count} {decision}" for decision, count in counts.items()), file=sys.stderr)
+    return None
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="templater", description="Generate strength training plans.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=("text", "json", "csv"), default="text",
+                        help="Output format (default: %(default)s).")
+    output.add_argument("--bar", type=float, help="Snap weights to plates loadable on a bar of this weight.")
+    output.add_argument("--plates",
+                        help="Plate inventory as <plate>:<total count>,..., loaded in pairs (implies --bar 20).")
+
+    profile = argparse.ArgumentParser(add_help=False)
+    profile.add_argument("--profile", nargs="?", const="-", metavar="PATH",
+                         help="Write phase timings as JSON to PATH (default: stderr).")
+    profile.add_argument("--profile-memory", action="store_true", help="Include the tracemalloc peak in --profile.")
+
+    command = commands.add_parser("wendler", parents=[output, profile], help="A Wendler 5/3/1 cycle.")
+    command.add_argument("--config", help="YAML file with the same fields as a roster row; flags override it.")
+    for lift in ("squat", "bench", "deadlift", "press"):
+        command.add_argument(f"--{lift}", type=float, help=f"{lift.title()} max.")
+    command.add_argument("--lifts", dest="active_lifts", help="Active lifts, e.g. squat|bench (default: all).")
+    command.add_argument("--template", dest="templates", action="append",
+                         help="Template name; repeat for several (e.g. fsl, widowmaker, bbb).")
+    command.add_argument("--fsl", dest="fsl_params", help="FSL sets and reps as <sets>x<reps>, e.g. 5x5.")
+    # The MaxType values, spelled out so --help does not import libwendler
+    command.add_argument("--max-type", choices=("training_max", "onerm"),
+                         help="Whether the lift maxes are training maxes or one-rep maxes.")
+    command.add_argument("--tm-percentage", type=float, help="Training max as a percentage of 1RM.")
+    command.add_argument("--header-text")
+    command.set_defaults(run=wendler)
+
+    command = commands.add_parser("hlm", parents=[output, profile], help="HLM weeks from YAML configs.")
+    command.add_argument("configs", nargs="*", default=[os.path.join(HERE, "hlm.yaml")], metavar="CONFIG",
+                         help="YAML configs, each possibly holding several documents (default: hlm.yaml).")
+    command.set_defaults(run=hlm)
+
+    command = commands.add_parser("roster", parents=[output], help="One plan per row of a roster file.")
+    command.add_argument("roster", help="CSV, JSON Lines or YAML roster.")
+    command.add_argument("--cache-size", type=int, default=4096,
+                         help="Plans to reuse across identical athletes; 0 disables (default: %(default)s).")
+    command.add_argument("--store", metavar="PATH", help="Write the plans to a binary plan store instead.")
+    command.add_argument("--db", metavar="PATH",
+                         help="Upsert the rows and their plans into a SQLite database instead.")
+    command.add_argument("--workers", type=int, default=1, help="Worker processes (default: %(default)s).")
+    command.add_argument("--chunk-size", type=int, default=1000,
+                         help="Rows per worker task (default: %(default)s).")
+    command.add_argument("--shard-index", type=int, default=0, help="Which shard of the roster to run, from 0.")
+    command.add_argument("--shard-count", type=int, default=1,
+                         help="Split the roster into this many contiguous shards (default: %(default)s).")
+    command.set_defaults(run=roster)
+
+    command = commands.add_parser("fetch", help="Athletes' plans from a plan store.")
+    command.add_argument("--format", choices=("text", "json", "csv"), default="text",
+                         help="Output format (default: %(default)s).")
+    command.add_argument("store", help="A plan store written by roster --store.")
+    command.add_argument("athletes", nargs="+", metavar="ATHLETE")
+    command.set_defaults(run=fetch)
+
+    command = commands.add_parser("serve", parents=[output], help="Run the HTTP plan service.")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8531)
+    command.add_argument("--cache-size", type=int, default=1024, help="Cached responses (default: %(default)s).")
+    command.set_defaults(run=serve)
+
+    command = commands.add_parser("watch", parents=[output],
+                                  help="Regenerate configs in a directory tree as they change.")
+    command.add_argument("root", help="Directory of YAML configs, searched recursively.")
+    command.add_argument("--output", metavar="DIR",
+                         help="Write each config's plans to DIR/<config path>.<format> (default: stdout).")
+    command.add_argument("--skip-initial", action="store_true",
+                         help="Only regenerate configs that change after startup.")
+    command.add_argument("--debounce", type=float, default=0.1,
+                         help="Seconds of quiet before regenerating (default: %(default)s).")
+    command.add_argument("--poll", action="store_true", help="Poll the tree even where inotify is available.")
+    command.add_argument("--poll-interval", type=float, default=1.0,
+                         help="Seconds between polls (default: %(default)s).")
+    command.set_defaults(run=watch)
+
+    command = commands.add_parser("autoregulate",
+                                  help="Next cycle's roster, with training maxes adjusted from AMRAP results.")
+    command.add_argument("roster", help="This cycle's Wendler roster (CSV, JSON Lines or YAML).")
+    command.add_argument("results", help="Logged AMRAP sets with athlete, lift, week and reps columns.")
+    command.add_argument("--min-extra-reps", type=float, default=2,
+                         help="Reps beyond every AMRAP target needed to increase (default: %(default)s).")
+    command.add_argument("--reset-percentage", type=float, default=90.0,
+                         help="Percentage of the training max to reset to on a miss (default: %(default)s).")
+    command.set_defaults(run=autoregulate)
+
+    return parser
+
+def main(argv=None) -> int:
+    args = _parser().parse_args(argv)
+    try:
+        instrument = args.run(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"templater {args.command}: {e}", file=sys.stderr)
+        return 1
+    if instrument is not None and instrument.enabled:
+        instrument.dump(args.profile)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+from libautoreg import HOLD, INCREASE, RESET, autoregulate
+
+MAXES = {"squat": 140, "bench": 100, "deadlift": 180, "press": 60}
+
+def test_results_without_an_athlete_are_rejected():
+    errors = []
+    roster = [(1, dict(MAXES)), (2, dict(MAXES))]
+    results = [(2, {"lift": "squat", "week": 1, "reps": 2}),
+               (3, {"athlete": "2", "lift": "bench", "week": 1, "reps": 9})]
+    result = autoregulate(roster, results, on_error=errors.append)
+    assert [error.line for error in errors] == [2]
+    assert result.decisions[1].tolist() == [HOLD, INCREASE, HOLD, HOLD]
+
+def test_duplicate_roster_athletes_are_rejected():
+    errors = []
+    roster = [(1, dict(MAXES, athlete="a")), (2, dict(MAXES, athlete="a", squat=200))]
+    results = [(1, {"athlete": "a", "lift": "squat", "week": 3, "reps": 0})]
+    result = autoregulate(roster, results, on_error=errors.append)
+    assert [error.line for error in errors] == [2]
+    assert result.athletes == ["a"] and result.decision(0, "squat") == "reset"
+    assert result.decisions[0, 0] == RESET
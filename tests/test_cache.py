@@ -0,0 +1,27 @@
+import os
+
+from libcache import PlanCache
+from libconfig import load_config
+from libhlm import generator_from_config
+from libplan import JSONRenderer, TextRenderer
+from libwendler import MaxType, WendlerBasic531Generator
+
+def _wendler(squat):
+    return WendlerBasic531Generator(squat=squat, bench=80, deadlift=120, press=50,
+                                    max_type=MaxType.TRAINING_MAX)
+
+def test_close_training_maxes_get_their_own_plans():
+    cache = PlanCache()
+    for renderer in (TextRenderer(), JSONRenderer()):
+        for squat in (94.2301, 94.2349):
+            generator = _wendler(squat)
+            assert cache.render(generator, renderer) == renderer.format(generator.build_plan())
+    assert cache.stats()["size"] == 2
+
+def test_int_and_float_weights_are_rendered_as_given():
+    cache = PlanCache()
+    renderer = TextRenderer()
+    config = load_config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hlm.yaml"))
+    for weight in (50, 50.0):
+        generator = generator_from_config(dict(config, secondary_press=weight))
+        assert cache.render(generator, renderer) == renderer.format(generator.build_plan())
@@ -0,0 +1,19 @@
+from libdb import PlanDatabase
+
+def test_mistyped_inputs_are_rejected_per_row(tmp_path):
+    errors = []
+    rows = [(1, {"athlete": "a", "squat": 100, "fsl_params": [3, 5]}),
+            (2, {"athlete": "b", "squat": 100, "pull": "heavy"}),
+            (3, {"athlete": "c", "squat": 100})]
+    with PlanDatabase(str(tmp_path / "plans.db")) as db:
+        stats = db.store_roster(rows, errors.append)
+        assert (stats.plans, stats.errors) == (1, 2)
+        assert [error.line for error in errors] == [1, 2]
+        assert db.inputs("c") == {"athlete": "c", "squat": 100}
+        assert db.plan("a") is None
+
+def test_duplicate_athletes_in_a_batch_keep_the_last_row(tmp_path):
+    rows = [(1, {"athlete": "a", "squat": 100}), (2, {"athlete": "a", "squat": 200})]
+    with PlanDatabase(str(tmp_path / "plans.db")) as db:
+        assert db.store_roster(rows).plans == 1
+        assert db.plan("a").maxes["squat"] == 200
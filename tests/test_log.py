@@ -0,0 +1,22 @@
+from liblog import E1RMIndex
+from libwendler import OneRMFormula
+
+LOG = """athlete,lift,weight,reps,date
+a,squat,100,5,2026-01-01
+a,squat,110,5,not-a-date
+a,,100,5,2026-01-02
+a,squat,105,3,2026-01-05
+"""
+
+def test_index_with_method_name_saves_and_loads(tmp_path):
+    log = tmp_path / "log.csv"
+    log.write_text(LOG)
+    index = E1RMIndex(method="epley")
+    assert index.method is OneRMFormula.EPLEY
+    assert index.ingest(str(log)) == 2
+
+    index.save(str(tmp_path / "index.json"))
+    loaded = E1RMIndex.load(str(tmp_path / "index.json"))
+    assert loaded.method is OneRMFormula.EPLEY
+    assert loaded.maxes("a") == index.maxes("a")
+    assert loaded.rolling_best("a", "squat") == index.rolling_best("a", "squat")
@@ -0,0 +1,22 @@
+import pytest
+
+from libplan import TextRenderer
+from libroster import generate_roster
+
+GOOD = {"athlete": "ok", "squat": 140, "bench": 100, "deadlift": 180, "press": 60}
+
+@pytest.mark.parametrize("row", [
+    {"max_type": 1},
+    {"templates": "fsl", "fsl_params": [3, 5]},
+    {"fsl_params": [3, 5]},
+    {"generator": "HLMAlternatePressingGenerator", "primary_press_name": 5},
+    {"generator": "HLMAlternatePressingGenerator", "heavy_squat_name": None},
+    {"generator": "HLMAlternatePressingGenerator", "medium_pull": 120},
+    ["not", "an", "object"],
+], ids=["max-type", "fsl-list", "fsl-unused", "hlm-name", "hlm-no-name", "hlm-unnamed-pull", "list"])
+def test_bad_row_is_reported_and_the_stream_continues(row):
+    errors = []
+    rows = [(1, dict(GOOD, athlete="bad", **row) if isinstance(row, dict) else row), (2, GOOD)]
+    plans = list(generate_roster(rows, TextRenderer(), errors.append))
+    assert len(plans) == 1 and "ok" in plans[0]
+    assert [error.line for error in errors] == [1]
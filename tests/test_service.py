@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+from libservice import PlanService
+
+WENDLER = {"squat": 140, "bench": 100, "deadlift": 180, "press": 60, "templates": ["fsl"],
+           "fsl_params": {"sets": 5, "reps": 5}}
+
+async def _request(port: int, method: str = "POST", target: str = "/wendler", body: bytes = b"",
+                   raw: bytes = None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(raw if raw is not None else (
+            f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body))
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), payload
+
+def _run(scenario):
+    async def main():
+        service = PlanService(cache_size=64)
+        server = await service.start(port=0)
+        async with server:
+            return await scenario(service, server.sockets[0].getsockname()[1])
+    return asyncio.run(main())
+
+def test_concurrent_requests_share_cache_within_latency_bound():
+    distinct = 8
+    bodies = [json.dumps(dict(WENDLER, squat=140 + 2.5 * (i % distinct))).encode() for i in range(200)]
+
+    async def scenario(service, port):
+        async def timed(body):
+            start = time.perf_counter()
+            result = await _request(port, body=body)
+            return result, time.perf_counter() - start
+
+        return service, await asyncio.gather(*(timed(body) for body in bodies))
+
+    service, results = _run(scenario)
+    statuses = [status for (status, _), _ in results]
+    latencies = sorted(latency for _, latency in results)
+
+    assert statuses == [200] * len(bodies)
+    # Identical parameters get identical bodies from one cached generation each
+    assert len(service.cache) == distinct
+    by_body = {}
+    for body, ((_, payload), _) in zip(bodies, results):
+        assert by_body.setdefault(body, payload) == payload
+        assert json.loads(payload)["family"] == "wendler"
+    assert latencies[int(0.95 * len(latencies))] < 2.0
+    assert latencies[-1] < 5.0
+
+def test_invalid_parameters_are_a_bad_request():
+    async def scenario(service, port):
+        return await asyncio.gather(
+            _request(port, body=b"[1, 2]"),
+            _request(port, body=json.dumps(dict(WENDLER, fsl_params={"sets": 20, "reps": 5})).encode()),
+            _request(port, target="/wendler?format=xml", body=b"{}"),
+            _request(port, method="GET"),
+            _request(port, target="/nope"),
+        )
+
+    assert [status for status, _ in _run(scenario)] == [400, 400, 400, 405, 404]
+
+def test_unexpected_errors_are_answered_with_500():
+    def fail(path, fmt, params):
+        raise RuntimeError("boom")
+
+    async def scenario(service, port):
+        service._generate = fail
+        return await _request(port, body=b"{}")
+
+    status, payload = _run(scenario)
+    assert status == 500
+    assert b"boom" in payload
+
+def test_malformed_request_is_answered_with_400():
+    async def scenario(service, port):
+        return await asyncio.gather(
+            _request(port, raw=b"GARBAGE\r\n\r\n"),
+            _request(port, raw=b"POST /wendler HTTP/1.1\r\nContent-Length: x\r\n\r\n"),
+        )
+
+    assert [status for status, _ in _run(scenario)] == [400, 400]
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+from bench import HERE, STARTUP_BUDGETS, measure_command
+from libwendler import MaxType
+
+WENDLER = ["wendler", "--squat", "140", "--bench", "100", "--deadlift", "180", "--press", "60"]
+
+# Runs templater.main() in this interpreter, then reports which heavy modules it pulled in
+PROBE = """
+import sys, templater
+try:
+    templater.main(sys.argv[1:])
+except SystemExit:
+    pass
+print(",".join(name for name in ("yaml", "numpy") if name in sys.modules), file=sys.stderr)
+"""
+
+def _heavy_modules(argv: list) -> str:
+    result = subprocess.run([sys.executable, "-c", PROBE, *argv], cwd=HERE, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+
+@pytest.mark.parametrize("argv", [["--help"], ["wendler", "--help"], WENDLER],
+                         ids=["help", "wendler-help", "wendler"])
+def test_startup_skips_heavy_imports(argv):
+    assert _heavy_modules(argv) == ""
+
+@pytest.mark.parametrize("command", sorted(STARTUP_BUDGETS))
+def test_startup_within_budget(command):
+    # Measured the way bench.py --check measures them
+    bare = measure_command(["-c", "pass"])
+    overhead = measure_command(command.split()) - bare
+    assert overhead <= STARTUP_BUDGETS[command]
+
+def test_max_type_choices_match_enum():
+    result = subprocess.run([sys.executable, "templater.py", "wendler", "--help"], cwd=HERE, check=True,
+                            stdout=subprocess.PIPE, text=True)
+    assert "{" + ",".join(m.value for m in MaxType) + "}" in result.stdout
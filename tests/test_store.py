@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from libconfig import load_config
+from libhlm import generator_from_config
+from libplan import CSVRenderer, JSONRenderer, TextRenderer
+from libstore import PlanStore, PlanStoreWriter
+from libwendler import WendlerBasic531Generator
+
+HLM_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hlm.yaml")
+
+@pytest.mark.parametrize("renderer", [TextRenderer(), JSONRenderer(), CSVRenderer()], ids=["text", "json", "csv"])
+def test_fetched_plans_render_as_built(tmp_path, renderer):
+    generators = {
+        "hlm": generator_from_config(load_config(HLM_CONFIG)),
+        "wendler": WendlerBasic531Generator(squat=140, bench=100, deadlift=180, press=60,
+                                            templates=["fsl"], fsl_params={"sets": 5, "reps": 5}),
+    }
+    path = str(tmp_path / "plans.bin")
+    with PlanStoreWriter(path) as writer:
+        for athlete, generator in generators.items():
+            writer.add(generator.build_plan(), athlete)
+
+    with PlanStore(path) as store:
+        for athlete, generator in generators.items():
+            plan = generator.build_plan()
+            plan.athlete = athlete
+            assert renderer.format(store[athlete]) == renderer.format(plan)
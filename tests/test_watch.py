@@ -0,0 +1,33 @@
+import pathlib
+import shutil
+
+import pytest
+
+from libwatch import ConfigWatcher
+
+CONFIG = pathlib.Path(__file__).resolve().parent.parent.joinpath("hlm.yaml").read_text()
+
+def test_running_out_of_watches_mid_batch_falls_back_to_polling(tmp_path):
+    for name in ("old", "keep"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "a.yaml").write_text(CONFIG)
+    watcher = ConfigWatcher(str(tmp_path), lambda path, plans: None, lambda error: None)
+    try:
+        watcher.scan(notify=False)
+        if watcher.polling:
+            pytest.skip("inotify is not available")
+
+        def exhausted(directory):
+            raise OSError(28, "No space left on device")
+        watcher._inotify.add = exhausted
+
+        # One batch: a new directory that cannot be watched, then a watched one removed
+        (tmp_path / "new").mkdir()
+        (tmp_path / "new" / "b.yaml").write_text(CONFIG)
+        shutil.rmtree(tmp_path / "old")
+
+        changed = watcher._wait(1.0)
+        assert watcher.polling
+        assert changed == {str(tmp_path / "new" / "b.yaml"), str(tmp_path / "old" / "a.yaml")}
+    finally:
+        watcher.close()
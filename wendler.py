@@ -1,8 +1,18 @@
 #!/usr/bin/python3
 
+import argparse
+
+from libprofile import Instrumentation, NULL_INSTRUMENTATION
 from libwendler import WendlerBasic531Generator, Template, OneRMFormula, estimate_1rm
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a Wendler 5/3/1 plan.")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="PATH",
+                        help="Write phase timings as JSON to PATH (default: stderr).")
+    parser.add_argument("--profile-memory", action="store_true", help="Include the tracemalloc peak in --profile.")
+    args = parser.parse_args()
+
+    instrument = Instrumentation(memory=args.profile_memory) if args.profile else NULL_INSTRUMENTATION
 
     method = OneRMFormula.BRZYCKI
 
@@ -13,11 +23,12 @@ if __name__ == '__main__':
         "press": {"weight": 60, "reps": 8}
     }
     lifts = {}
-    for lift, data in user_lifts.items():
-        if method != OneRMFormula.TRAININGMAX:
-            lifts[lift] = estimate_1rm(data["weight"], data["reps"], method=method)
-        else:
-            lifts[lift] = data["weight"]  # Use raw weight as 1RM if estimation is disabled
+    with instrument.phase("estimate_1rm"):
+        for lift, data in user_lifts.items():
+            if method != OneRMFormula.TRAININGMAX:
+                lifts[lift] = estimate_1rm(data["weight"], data["reps"], method=method)
+            else:
+                lifts[lift] = data["weight"]  # Use raw weight as 1RM if estimation is disabled
 
     plan = WendlerBasic531Generator(
         squat=lifts["squat"], bench=lifts["bench"], 
@@ -28,6 +39,10 @@ if __name__ == '__main__':
 Accessory Pairings:
   Squat: Chins
   OHP: Dips
-  Deadlift: Rows"""
+  Deadlift: Rows""",
+        instrument=instrument
     )
-    plan.generate()
\ No newline at end of file
+    plan.generate()
+
+    if instrument.enabled:
+        instrument.dump(args.profile)
\ No newline at end of file